@@ -0,0 +1,155 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class LocationStats:
+    """Statistiky přírůstku nových nabídek pro jednu lokalitu"""
+
+    def __init__(self, base_interval, max_seen):
+        self.seen = OrderedDict()  # (source, url) -> None, omezená velikost
+        self.max_seen = max_seen
+        self.cycles = 0
+        self.last_new = 0
+        self.ewma_new = 0.0
+        self.new_per_hour = 0.0
+        self.last_cycle_at = None
+        self.interval = base_interval
+        self.reason = "první cyklus, základní interval"
+        self.sources = {}  # source -> {"last_new", "total_new", "ewma_new"}
+
+    def remember(self, key):
+        if key in self.seen:
+            self.seen.move_to_end(key)
+            return False
+        self.seen[key] = None
+        if len(self.seen) > self.max_seen:
+            self.seen.popitem(last=False)
+        return True
+
+
+class AdaptiveInterval:
+    """
+    Adaptivní interval podle přírůstku nových nabídek.
+
+    Po každém cyklu se spočítají nabídky, které v dané lokalitě ještě
+    nebyly vidět (celkem i po zdrojích). Vysoký přírůstek interval zkracuje,
+    cyklus bez novinek ho prodlužuje; neúspěšný scraping (žádná stažená
+    stránka) interval nemění. Výsledek je vždy v mezích
+    [min_interval, max_interval] a nesmí překročit denní rozpočet stažení
+    stránek - cyklus se stránkováním stáhne až CRAWL_MAX_PAGES stránek z každého
+    zdroje, proto se počítá se skutečným počtem stažení z posledního cyklu.
+    """
+
+    def __init__(self, min_interval=900, max_interval=21600, daily_budget=0,
+                 high_churn=5, speedup=0.5, backoff=1.5, alpha=0.5, max_seen=5000):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.daily_budget = daily_budget
+        self.high_churn = high_churn
+        self.speedup = speedup
+        self.backoff = backoff
+        self.alpha = alpha
+        self.max_seen = max_seen
+        self._lock = threading.Lock()
+        self._locations = {}
+
+    def _budget_floor(self, fetches):
+        if not self.daily_budget or not fetches:
+            return 0
+        return 86400 * fetches / self.daily_budget
+
+    def record_cycle(self, location, listings, base_interval, scrape):
+        """
+        Zapracuje výsledek cyklu a přepočítá interval pro lokalitu.
+        listings může být i generátor - z nabídek se drží jen klíče (zdroj, URL).
+        scrape je souhrn scraperu (pages, errors, fetched), který se vyplní během čtení listings.
+        """
+        keys = [(item.get("source", ""), item["url"]) for item in listings if "url" in item]
+        fetches = scrape.get("fetched", scrape.get("pages", 0) + scrape.get("errors", 0))
+        now = time.time()
+        with self._lock:
+            stats = self._locations.get(location)
+            if stats is None:
+                stats = LocationStats(base_interval, self.max_seen)
+                self._locations[location] = stats
+
+            # Scraper nedostupný nebo žádná stránka nestažena (např. všechny jističe otevřené) -
+            # prázdný výsledek neznamená "žádné novinky", interval ani statistiky se nemění
+            if not scrape.get("pages"):
+                stats.reason = "scraping selhal (žádná stažená stránka), interval beze změny"
+                return stats.interval, stats.reason
+
+            new_by_source = {}
+            for source, url in keys:
+                if stats.remember((source, url)):
+                    new_by_source[source] = new_by_source.get(source, 0) + 1
+                else:
+                    new_by_source.setdefault(source, 0)
+            new_total = sum(new_by_source.values())
+
+            first_cycle = stats.cycles == 0
+            stats.cycles += 1
+            if not first_cycle:
+                stats.last_new = new_total
+                stats.ewma_new = self.alpha * new_total + (1 - self.alpha) * stats.ewma_new
+                hours = max((now - stats.last_cycle_at) / 3600, 1 / 60)
+                stats.new_per_hour = self.alpha * (new_total / hours) + (1 - self.alpha) * stats.new_per_hour
+                for source, count in new_by_source.items():
+                    source_stats = stats.sources.setdefault(source, {"last_new": 0, "total_new": 0, "ewma_new": 0.0})
+                    source_stats["last_new"] = count
+                    source_stats["total_new"] += count
+                    source_stats["ewma_new"] = self.alpha * count + (1 - self.alpha) * source_stats["ewma_new"]
+            stats.last_cycle_at = now
+
+            # Rozhodnutí o dalším intervalu
+            if first_cycle:
+                interval = base_interval
+                reason = "první cyklus, základní interval"
+            elif new_total >= self.high_churn:
+                interval = stats.interval * self.speedup
+                reason = f"vysoký přírůstek ({new_total} nových), zkracuji"
+            elif new_total == 0:
+                interval = stats.interval * self.backoff
+                reason = "žádné nové nabídky, prodlužuji"
+            else:
+                interval = stats.interval
+                reason = f"mírný přírůstek ({new_total} nových), beze změny"
+
+            interval = min(max(interval, self.min_interval), self.max_interval)
+            floor = self._budget_floor(fetches)
+            if interval < floor:
+                interval = floor
+                reason += " (omezeno rozpočtem stažení)"
+
+            stats.interval = int(interval)
+            stats.reason = reason
+            return stats.interval, reason
+
+    def decide(self, location, base_interval, enabled):
+        """Vrací (interval, důvod) pro další cyklus"""
+        if not enabled:
+            return base_interval, "pevný interval"
+        with self._lock:
+            stats = self._locations.get(location)
+            if stats is None:
+                return base_interval, "zatím bez dat, základní interval"
+            return stats.interval, stats.reason
+
+    def status(self):
+        with self._lock:
+            return {
+                location: {
+                    "interval": stats.interval,
+                    "reason": stats.reason,
+                    "cycles": stats.cycles,
+                    "last_new": stats.last_new,
+                    "ewma_new": round(stats.ewma_new, 2),
+                    "new_per_hour": round(stats.new_per_hour, 2),
+                    "sources": {
+                        source: dict(values, ewma_new=round(values["ewma_new"], 2))
+                        for source, values in stats.sources.items()
+                    }
+                }
+                for location, stats in self._locations.items()
+            }
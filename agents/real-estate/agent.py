@@ -1,95 +1,289 @@
 import os
+import sys
 import time
 import json
 import requests
+import signal
 import threading
 from flask import Flask, request, jsonify
-
-# Načtení konfigurace z prostředí
-# Používáme globální proměnné, které budeme moci měnit za běhu
-config = {
-    "LOCATION": os.getenv("LOCATION", "Praha"),
-    "MIN_AREA": int(os.getenv("MIN_AREA", 50)),
-    "INTERVAL": int(os.getenv("INTERVAL", 10800)),  # v sekundách (3 hodiny)
-    "RUNNING": True  # Stav agenta (běží/zastaven)
-}
+from config_manager import ConfigManager
+from state_store import StateStore, VersionConflict
+from itertools import islice
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from scheduler import Scheduler, CycleCancelled
+from adaptive import AdaptiveInterval
+from results_store import ResultStore
+from subscribers import SubscriberRegistry, Notifier
+from embedded import EmbeddedServices, parse_embedded
+# Sdílené moduly (profiling.py, wire_format.py) leží ve services/common (v obrazu se kopírují vedle agent.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "services", "common"))
+from wire_format import Listing, iter_msgpack_records, msgpack, MSGPACK_TYPE, NDJSON_TYPE
+import profiling
+
+# Stav agenta - výchozí hodnoty z prostředí, za běhu se mění přes API
+# a ukládají se na disk (po restartu se obnoví poslední nastavení)
+state = StateStore(
+    path=os.getenv("STATE_PATH", "data/agent_state.json"),
+    defaults={
+        "LOCATION": os.getenv("LOCATION", "Praha"),
+        "MIN_AREA": int(os.getenv("MIN_AREA", 50)),
+        "INTERVAL": int(os.getenv("INTERVAL", 10800)),  # v sekundách (3 hodiny)
+        "ADAPTIVE": os.getenv("ADAPTIVE_INTERVAL", "false").lower() in ("1", "true", "yes"),
+        "RUNNING": True  # Stav agenta (běží/zastaven)
+    }
+)
 
 EMAIL_RECEIVER = os.getenv("EMAIL_RECEIVER")
 USER_WHATSAPP_NUMBER = os.getenv("USER_WHATSAPP_NUMBER")
 
+# Odběratelé výsledků - bez uloženého seznamu se použije příjemce z prostředí (všechny lokality)
+default_subscriber = {"id": "default", "name": "výchozí", "email": EMAIL_RECEIVER, "whatsapp": USER_WHATSAPP_NUMBER}
+subscribers = SubscriberRegistry(
+    path=os.getenv("SUBSCRIBERS_PATH", "data/subscribers.json"),
+    defaults=[default_subscriber] if EMAIL_RECEIVER or USER_WHATSAPP_NUMBER else [],
+    # Výchozí časové pásmo klidových hodin (odběratel může mít vlastní "timezone")
+    timezone=os.getenv("QUIET_HOURS_TZ", "Europe/Prague")
+)
+
+# Maximální počet nabídek předaných AI v jednom promptu
+MAX_PROMPT_LISTINGS = 50
+
+# Historie výsledků cyklů - /prompt odpovídá z posledního výsledku, pokud není starší než RESULT_MAX_AGE
+results = ResultStore(os.getenv("RESULTS_PATH", "data/results.db"))
+RESULT_MAX_AGE = int(os.getenv("RESULT_MAX_AGE", 3600))
+
+# Dávkové zpracování zpráv (/prompt/batch)
+PROMPT_BATCH_MAX = int(os.getenv("PROMPT_BATCH_MAX", 50))
+PROMPT_BATCH_CONCURRENCY = int(os.getenv("PROMPT_BATCH_CONCURRENCY", 4))
+
 # URL mikroslužeb (v Docker síti)
 SCRAPER_URL = os.getenv("SCRAPER_URL", "http://scraper:5001")
 AI_ANALYZER_URL = os.getenv("AI_ANALYZER_URL", "http://ai-analyzer:5002")
 EMAIL_URL = os.getenv("EMAIL_URL", "http://email:5003")
 WHATSAPP_URL = os.getenv("WHATSAPP_URL", "http://whatsapp:5004")
 
-# Flask aplikace pro ovládání agenta
-app = Flask(__name__)
+SERVICES = {
+    "scraper": SCRAPER_URL,
+    "ai-analyzer": AI_ANALYZER_URL,
+    "email": EMAIL_URL,
+    "whatsapp": WHATSAPP_URL
+}
 
-def load_agent_config():
-    """Načte konfiguraci agenta (prompty, model) ze souboru"""
-    try:
-        with open("agent_config.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Chyba při načítání agent_config.json: {e}")
-        return {}
+# Služby běžící přímo v procesu agenta (EMBEDDED_SERVICES=scraper,ai-analyzer,email,whatsapp nebo all),
+# ostatní se volají přes HTTP; SERVICES_DIR ukazuje na adresář services/ s kódem služeb
+embedded = EmbeddedServices(
+    parse_embedded(os.getenv("EMBEDDED_SERVICES", "")),
+    os.getenv("SERVICES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "services"))
+)
+
+# Formát streamu ze scraperu: msgpack (kompaktní, pokud je knihovna nainstalovaná) nebo ndjson
+SCRAPER_FORMAT = os.getenv("SCRAPER_FORMAT", "msgpack" if msgpack else "ndjson")
+if SCRAPER_FORMAT == "msgpack" and msgpack is None:
+    print("SCRAPER_FORMAT=msgpack, ale knihovna msgpack není nainstalovaná - používám ndjson.")
+    SCRAPER_FORMAT = "ndjson"
+
+# Sdílená HTTP session na mikroslužby - keep-alive spojení z poolu místo nového spojení na každé volání
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 8))
+http = requests.Session()
+http.mount("http://", requests.adapters.HTTPAdapter(pool_connections=len(SERVICES), pool_maxsize=HTTP_POOL_SIZE))
+http.mount("https://", requests.adapters.HTTPAdapter(pool_connections=len(SERVICES), pool_maxsize=HTTP_POOL_SIZE))
+
+# Režim služeb a připravenost HTTP služeb zjištěná při pre-warmu (PREWARM=true)
+service_readiness = embedded.status()
+
+def call_service(name, path, payload, timeout):
+    """Volání služby - v embedded režimu funkcí v procesu, jinak přes HTTP. Vrací (HTTP status, odpověď)"""
+    if name in embedded:
+        return embedded.call(name, path, payload, timeout)
+    response = http.post(f"{SERVICES[name]}{path}", json=payload, timeout=timeout)
+    if "application/json" not in response.headers.get("Content-Type", ""):
+        return response.status_code, {}
+    return response.status_code, response.json()
 
-agent_config = load_agent_config()
+# Flask aplikace pro ovládání agenta
+app = Flask(__name__)
+# Profilování za běhu (/debug/profile, hlavička X-Profile), jen s DEBUG_TOKEN
+profiling.install(app, "real-estate-agent")
+
+# Adaptivní interval podle přírůstku nových nabídek (v mezích a rozpočtu stažení za den)
+adaptive = AdaptiveInterval(
+    min_interval=int(os.getenv("MIN_INTERVAL", 900)),
+    max_interval=int(os.getenv("MAX_INTERVAL", 21600)),
+    daily_budget=int(os.getenv("SCRAPE_BUDGET", 0)),
+    high_churn=int(os.getenv("HIGH_CHURN", 5))
+)
+
+# Konfigurace agenta (prompty, model, zdroje) - držená v paměti, změny souborů se načítají za běhu
+config_manager = ConfigManager(
+    agent_config_path=os.getenv("AGENT_CONFIG_PATH", "config/agent_config.json"),
+    sources_path=os.getenv("SOURCES_PATH", "config/sources.json"),
+    poll_interval=float(os.getenv("CONFIG_POLL_INTERVAL", 2))
+)
+
+def public_config(snap):
+    return {
+        "location": snap["LOCATION"],
+        "min_area": snap["MIN_AREA"],
+        "interval": snap["INTERVAL"],
+        "adaptive": snap["ADAPTIVE"],
+        "version": snap["VERSION"]
+    }
+
+def next_interval():
+    """Interval do dalšího cyklu a důvod (pevný nebo adaptivní)"""
+    snap = state.snapshot()
+    return adaptive.decide(snap["LOCATION"], snap["INTERVAL"], snap["ADAPTIVE"])
 
 @app.route('/status', methods=['GET'])
 def get_status():
+    snap = state.snapshot()
+    interval, reason = next_interval()
     return jsonify({
-        "status": "running" if config["RUNNING"] else "stopped",
-        "config": {
-            "location": config["LOCATION"],
-            "min_area": config["MIN_AREA"],
-            "interval": config["INTERVAL"]
+        "status": "running" if snap["RUNNING"] else "stopped",
+        "config": public_config(snap),
+        "agent_config": config_manager.status(),
+        "scheduler": scheduler.status(),
+        "services": service_readiness,
+        "schedule": {
+            "mode": "adaptive" if snap["ADAPTIVE"] else "fixed",
+            "interval": interval,
+            "reason": reason,
+            "locations": adaptive.status()
         }
     })
 
 @app.route('/start', methods=['POST'])
 def start_agent():
-    config["RUNNING"] = True
+    state.update(RUNNING=True)
     return jsonify({"message": "Agent byl spuštěn."})
 
 @app.route('/stop', methods=['POST'])
 def stop_agent():
-    config["RUNNING"] = False
+    state.update(RUNNING=False)
     return jsonify({"message": "Agent byl pozastaven."})
 
+def config_changes(params):
+    """
+    Ověří změny nastavení (location, min_area, interval) z /config i z příkazu
+    UPDATE_CONFIG a vrátí je jako klíče stavu. Při chybě vyhodí ValueError.
+    """
+    changes = {}
+    if "location" in params:
+        if not isinstance(params["location"], str) or not params["location"].strip():
+            raise ValueError("location musí být neprázdný text")
+        changes["LOCATION"] = params["location"].strip()
+    if "min_area" in params:
+        try:
+            changes["MIN_AREA"] = int(params["min_area"])
+        except (TypeError, ValueError):
+            raise ValueError("min_area musí být číslo") from None
+        if changes["MIN_AREA"] < 0:
+            raise ValueError("min_area nesmí být záporná")
+    if "interval" in params:
+        try:
+            changes["INTERVAL"] = int(params["interval"])
+        except (TypeError, ValueError):
+            raise ValueError("interval musí být číslo") from None
+        if changes["INTERVAL"] <= 0:
+            raise ValueError("interval musí být kladný")
+    return changes
+
 @app.route('/config', methods=['POST'])
 def update_config():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Očekáván JSON objekt"}), 400
+    try:
+        changes = config_changes(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    expected_version = data.get("version")
+    if expected_version is not None and (isinstance(expected_version, bool) or not isinstance(expected_version, int)):
+        return jsonify({"error": "version musí být celé číslo"}), 400
+    if "adaptive" in data:
+        if not isinstance(data["adaptive"], bool):
+            return jsonify({"error": "adaptive musí být true/false"}), 400
+        changes["ADAPTIVE"] = data["adaptive"]
     
-    if "location" in data:
-        config["LOCATION"] = data["location"]
-    if "min_area" in data:
-        try:
-            config["MIN_AREA"] = int(data["min_area"])
-        except ValueError:
-            return jsonify({"error": "min_area musí být číslo"}), 400
-    if "interval" in data:
-        try:
-            config["INTERVAL"] = int(data["interval"])
-        except ValueError:
-            return jsonify({"error": "interval musí být číslo"}), 400
+    try:
+        snap = state.update(expected_version=expected_version, **changes)
+    except VersionConflict as e:
+        return jsonify({"error": f"Konfigurace byla mezitím změněna: {e}"}), 409
             
     return jsonify({
         "message": "Konfigurace aktualizována.",
-        "config": {
-            "location": config["LOCATION"],
-            "min_area": config["MIN_AREA"],
-            "interval": config["INTERVAL"]
-        }
+        "config": public_config(snap)
     })
 
 @app.route('/run-now', methods=['POST'])
 def run_now():
-    """Okamžité spuštění vyhledávání (v novém vlákně, aby neblokovalo request)"""
-    threading.Thread(target=run_cycle).start()
+    """Okamžité spuštění vyhledávání (cyklus běží na pozadí v plánovači)"""
+    if not scheduler.trigger():
+        return jsonify({"error": "Cyklus už běží."}), 409
     return jsonify({"message": "Vyhledávání spuštěno na pozadí."})
 
+@app.route('/cancel', methods=['POST'])
+def cancel_cycle():
+    """Zrušení právě běžícího cyklu"""
+    cycle_id = scheduler.cancel()
+    if cycle_id is None:
+        return jsonify({"message": "Žádný cyklus neběží."})
+    return jsonify({"message": f"Cyklus #{cycle_id} bude zrušen.", "cycle_id": cycle_id})
+
+@app.route('/results', methods=['GET'])
+def list_results():
+    """Historie výsledků cyklů (stránkování přes limit/offset, filtr location)"""
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+        offset = max(int(request.args.get("offset", 0)), 0)
+    except ValueError:
+        return jsonify({"error": "limit a offset musí být čísla"}), 400
+    location = request.args.get("location")
+    
+    items, total = results.list(limit=limit, offset=offset, location=location)
+    return jsonify({"results": items, "total": total, "limit": limit, "offset": offset})
+
+@app.route('/results/<int:result_id>', methods=['GET'])
+def get_result(result_id):
+    """Detail výsledku včetně ID vstupních nabídek"""
+    result = results.get(result_id)
+    if not result:
+        return jsonify({"error": "Výsledek nenalezen"}), 404
+    return jsonify(result)
+
+CONTROL_COMMANDS = ("UPDATE_CONFIG", "START", "STOP")
+
+@app.route('/subscribers', methods=['GET'])
+def list_subscribers():
+    return jsonify({"subscribers": subscribers.all(), "delivery": notifier.status()})
+
+@app.route('/subscribers', methods=['POST'])
+def upsert_subscriber():
+    """
+    Přidání/úprava odběratele. Očekávaný JSON:
+    {
+        "id": "jan",  # volitelné (bez id se vytvoří nový)
+        "email": "jan@example.com",
+        "whatsapp": "+420123456789",
+        "channels": ["email", "whatsapp"],
+        "locations": ["Praha", "Brno"],  # prázdné = všechny lokality
+        "quiet_hours": {"start": "22:00", "end": "07:00"},
+        "timezone": "Europe/Prague"  # volitelné, jinak QUIET_HOURS_TZ
+    }
+    """
+    try:
+        subscriber = subscribers.upsert(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"message": "Odběratel uložen.", "subscriber": subscriber})
+
+@app.route('/subscribers/<subscriber_id>', methods=['DELETE'])
+def delete_subscriber(subscriber_id):
+    if not subscribers.remove(subscriber_id):
+        return jsonify({"error": "Odběratel nenalezen"}), 404
+    return jsonify({"message": "Odběratel odebrán."})
+
 @app.route('/prompt', methods=['POST'])
 def handle_prompt():
     """Zpracování přirozeného jazyka od uživatele"""
@@ -105,126 +299,247 @@ def handle_prompt():
     if not intent:
         # Fallback: Pokud se nepodaří zjistit záměr, považujeme to za chat
         intent = {"command": "CHAT", "parameters": {}}
-        
-    command = intent.get("command")
-    params = intent.get("parameters", {})
-    
-    response_msg = ""
     
     # 2. Vykonání akce
+    response_msg, result_id = execute_intent(user_message, intent, fresh=data.get("fresh", False))
+    
+    body = {"message": response_msg, "intent": intent}
+    if result_id:
+        body["result_id"] = result_id
+    return jsonify(body)
+
+@app.route('/prompt/batch', methods=['POST'])
+def handle_prompt_batch():
+    """
+    Zpracování více zpráv najednou. Očekávaný JSON:
+    {"messages": ["Najdi byty v Brně", "Ahoj", ...], "fresh": false}
+
+    Záměry se klasifikují jedním voláním AI, SEARCH pro stejnou lokalitu
+    sdílí jeden scraping a volání AI běží souběžně (max PROMPT_BATCH_CONCURRENCY).
+    Příkazy měnící stav působí jen na zprávy za nimi, chyba jedné zprávy
+    se zapíše do její položky. Výsledky jsou ve stejném pořadí jako zprávy.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Očekáván JSON objekt"}), 400
+    messages = data.get("messages", [])
+    fresh = data.get("fresh", False)
+    
+    if not isinstance(messages, list) or not messages or not all(isinstance(m, str) and m for m in messages):
+        return jsonify({"error": "messages musí být neprázdný seznam neprázdných zpráv"}), 400
+    if len(messages) > PROMPT_BATCH_MAX:
+        return jsonify({"error": f"Maximálně {PROMPT_BATCH_MAX} zpráv v jednom požadavku"}), 400
+    
+    batch_started = time.monotonic()
+    
+    # 1. Klasifikace všech zpráv jedním voláním
+    intents = interpret_intents(messages)
+    classify_time = round(time.monotonic() - batch_started, 3)
+    
+    items = [
+        {"index": i, "message": message, "intent": intent or {"command": "CHAT", "parameters": {}},
+         "timings": {"classify": classify_time}}
+        for i, (message, intent) in enumerate(zip(messages, intents))
+    ]
+    
+    scraped = {}
+    scrape_times = {}
+    def prefetch(loc):
+        started = time.monotonic()
+        scraped[loc] = scrape_listings_with_params(loc, limit=MAX_PROMPT_LISTINGS)
+        scrape_times[loc] = round(time.monotonic() - started, 3)
+    
+    def run_item(item):
+        started = time.monotonic()
+        try:
+            item["response"], result_id = execute_intent(
+                item["message"], item["intent"], fresh=fresh, listings_for=scraped.get
+            )
+            if result_id:
+                item["result_id"] = result_id
+        except Exception as e:
+            item["error"] = str(e)
+        item["timings"]["execute"] = round(time.monotonic() - started, 3)
+    
+    def run_segment(pool, segment):
+        # Jeden scraping pro každou lokalitu, kterou nelze zodpovědět z uloženého výsledku
+        to_scrape = set()
+        for item in segment:
+            if item["intent"].get("command") == "SEARCH":
+                loc = item["intent"].get("parameters", {}).get("location") or state.get("LOCATION")
+                item["location"] = loc
+                if loc not in scraped and (fresh or not results.latest(loc, RESULT_MAX_AGE)):
+                    to_scrape.add(loc)
+        list(pool.map(prefetch, to_scrape))
+        # Volání AI souběžně s omezeným počtem vláken
+        list(pool.map(run_item, segment))
+    
+    # 2. Zpracování v pořadí zpráv: dotazy mezi dvěma příkazy měnícími stav běží souběžně,
+    #    příkaz se vykoná až po nich, takže každý dotaz vidí jen změny ze zpráv před ním
+    with ThreadPoolExecutor(max_workers=PROMPT_BATCH_CONCURRENCY) as pool:
+        segment = []
+        for item in items:
+            if item["intent"].get("command") not in CONTROL_COMMANDS:
+                segment.append(item)
+                continue
+            run_segment(pool, segment)
+            segment = []
+            run_item(item)
+        run_segment(pool, segment)
+    
+    # Časy položky: společná klasifikace + sdílený scraping její lokality + vlastní zpracování
+    for item in items:
+        loc = item.pop("location", None)
+        if loc in scrape_times:
+            item["timings"]["scrape"] = scrape_times[loc]
+        item["timings"]["total"] = round(sum(item["timings"].values()), 3)
+    
+    return jsonify({
+        "results": items,
+        "timings": {
+            "classify": classify_time,
+            "scrape": scrape_times,
+            "total": round(time.monotonic() - batch_started, 3)
+        }
+    })
+
+def execute_intent(user_message, intent, fresh=False, listings_for=None):
+    """
+    Vykoná rozpoznaný záměr a vrátí (odpověď, id použitého výsledku nebo None).
+    listings_for(lokalita) může dodat již stažené nabídky (dávkové zpracování).
+    """
+    command = intent.get("command")
+    params = intent.get("parameters") or {}
+    
     if command == "UPDATE_CONFIG":
-        if "location" in params:
-            config["LOCATION"] = params["location"]
-        if "min_area" in params:
-            config["MIN_AREA"] = int(params["min_area"])
-        if "interval" in params:
-            config["INTERVAL"] = int(params["interval"])
-        response_msg = f"Konfigurace aktualizována: {config['LOCATION']}, min {config['MIN_AREA']}m2."
+        try:
+            changes = config_changes(params)
+        except ValueError as e:
+            return f"Nastavení nebylo změněno: {e}.", None
+        snap = state.update(**changes)
+        return f"Konfigurace aktualizována: {snap['LOCATION']}, min {snap['MIN_AREA']}m2.", None
         
     elif command == "START":
-        config["RUNNING"] = True
-        response_msg = "Agent byl spuštěn."
+        state.update(RUNNING=True)
+        return "Agent byl spuštěn.", None
         
     elif command == "STOP":
-        config["RUNNING"] = False
-        response_msg = "Agent byl pozastaven."
+        state.update(RUNNING=False)
+        return "Agent byl pozastaven.", None
 
     elif command == "SEARCH":
         # Uživatel chce explicitně hledat -> Scraping + Analýza
-        loc = params.get("location", config["LOCATION"])
+        loc = params.get("location") or state.get("LOCATION")
+        
+        # Čerstvý výsledek posledního cyklu -> odpověď bez nového scrapingu
+        cached = None if fresh else results.latest(loc, RESULT_MAX_AGE)
+        if cached:
+            return answer_from_result(cached, user_message), cached["id"]
         
         # Získání dat
-        listings = scrape_listings_with_params(loc)
+        listings = listings_for(loc) if listings_for else None
+        if listings is None:
+            listings = scrape_listings_with_params(loc, limit=MAX_PROMPT_LISTINGS)
         
         if not listings:
-            response_msg = f"Pro lokalitu {loc} nebyly nalezeny žádné nabídky."
-        else:
-            # AI Analýza s dotazem uživatele
-            response_msg = analyze_custom_query(listings, user_message, loc)
+            return f"Pro lokalitu {loc} nebyly nalezeny žádné nabídky.", None
+        # AI Analýza s dotazem uživatele
+        return analyze_custom_query(listings, user_message, loc), None
             
     elif command == "CHAT":
         # Běžná konverzace bez scrapingu
-        response_msg = chat_with_llm(user_message)
-        
-    else:
-        response_msg = f"Neznámý příkaz: {command}"
+        return chat_with_llm(user_message), None
         
-    return jsonify({"message": response_msg, "intent": intent})
+    return f"Neznámý příkaz: {command}", None
 
 def interpret_intent(user_message):
     """Převod přirozeného jazyka na strukturovaný příkaz pomocí AI"""
-    # Načtení promptu z konfigurace nebo použití defaultu
-    system_prompt = agent_config.get("prompts", {}).get("interpret_intent", """Jsi řídicí systém pro realitního agenta. Tvým úkolem je klasifikovat vstup uživatele.
-Dostupné příkazy:
-- UPDATE_CONFIG: Uživatel chce TRVALE změnit nastavení (slova jako "nastav", "změň", "odteď").
-- START: Spustit agenta.
-- STOP: Zastavit agenta.
-- SEARCH: Uživatel VÝSLOVNĚ žádá o nové vyhledání, stažení dat nebo průzkum trhu (slova jako "najdi", "vyhledej", "koukni se", "co je nového", "udělej sken").
-- CHAT: Vše ostatní. Běžná konverzace, dotazy na aktuální nastavení, nebo obecné dotazy, které NEVYŽADUJÍ stahování nových dat (např. "jaké je nastavení?", "ahoj", "co umíš?", "napiš mi básničku").
-
-Parametry: location (string), min_area (int), interval (int).
-
-Příklad 1: "Nastav lokalitu na Brno" -> {"command": "UPDATE_CONFIG", "parameters": {"location": "Brno"}}
-Příklad 2: "Najdi mi byty v Praze" -> {"command": "SEARCH", "parameters": {"location": "Praha"}}
-Příklad 3: "Jaké je tvé nastavení?" -> {"command": "CHAT", "parameters": {}}
-Příklad 4: "Vypiš mi krátké shrnutí jak vypadá trh" -> {"command": "SEARCH", "parameters": {}} (implikuje potřebu dat)
-Příklad 5: "Ahoj" -> {"command": "CHAT", "parameters": {}}
-
-Vrať POUZE validní JSON bez dalšího textu.""")
+    snap = config_manager.snapshot()
+    system_prompt = snap.prompt("interpret_intent").render()
 
     try:
-        response = requests.post(
-            f"{AI_ANALYZER_URL}/analyze",
-            json={
+        status, data = call_service(
+            "ai-analyzer", "/analyze",
+            {
                 "prompt": f"Uživatel říká: '{user_message}'",
                 "context": system_prompt,
-                "model": agent_config.get("model", "gpt-4o"),
+                "model": snap.model,
                 "temperature": 0.1
             },
             timeout=10
         )
         
-        if response.status_code == 200:
-            content = response.json().get("analysis", "")
+        if status == 200:
+            content = data.get("analysis", "")
             content = content.replace("```json", "").replace("```", "").strip()
-            import json
             return json.loads(content)
     except Exception as e:
         print(f"Chyba při interpretaci záměru: {e}")
         return None
 
+def interpret_intents(messages):
+    """Klasifikace více zpráv jedním voláním AI, při neúspěchu po jedné (souběžně)"""
+    if len(messages) == 1:
+        return [interpret_intent(messages[0])]
+    
+    snap = config_manager.snapshot()
+    system_prompt = snap.prompt("interpret_intent").render()
+    numbered = "\n".join(f"{i + 1}. '{message}'" for i, message in enumerate(messages))
+
+    try:
+        status, data = call_service(
+            "ai-analyzer", "/analyze",
+            {
+                "prompt": (
+                    f"Uživatel poslal {len(messages)} zpráv:\n{numbered}\n\n"
+                    f"Klasifikuj každou zprávu samostatně a vrať JSON pole s {len(messages)} objekty "
+                    "ve stejném pořadí jako zprávy."
+                ),
+                "context": system_prompt,
+                "model": snap.model,
+                "temperature": 0.1,
+                "max_tokens": 60 * len(messages) + 200
+            },
+            timeout=30
+        )
+        
+        if status == 200:
+            content = data.get("analysis", "")
+            content = content.replace("```json", "").replace("```", "").strip()
+            intents = json.loads(content)
+            if isinstance(intents, list) and len(intents) == len(messages):
+                return [intent if isinstance(intent, dict) else None for intent in intents]
+            print("Dávková interpretace vrátila neočekávaný počet záměrů, klasifikuji po jedné.")
+    except Exception as e:
+        print(f"Chyba při dávkové interpretaci záměrů: {e}")
+    
+    with ThreadPoolExecutor(max_workers=PROMPT_BATCH_CONCURRENCY) as pool:
+        return list(pool.map(interpret_intent, messages))
+
 def chat_with_llm(user_message):
     """Běžná konverzace s LLM s kontextem agenta (bez scrapingu)"""
-    prompt_template = agent_config.get("prompts", {}).get("chat_system", """Jsi realitní agent.
-Aktuální konfigurace:
-- Lokalita: {location}
-- Min. plocha: {min_area} m2
-- Interval: {interval} s
-- Stav: {status}
-
-Odpovídej na dotazy uživatele. 
-Pokud se uživatel ptá na konkrétní nabídky nebo aktuální stav trhu, UPOZORNI HO, že nemáš aktuální data a musí použít příkaz "najdi" nebo "vyhledej", aby jsi provedl nový průzkum.""")
-
-    system_prompt = prompt_template.format(
-        location=config['LOCATION'],
-        min_area=config['MIN_AREA'],
-        interval=config['INTERVAL'],
-        status='Běží' if config['RUNNING'] else 'Zastaven'
+    snap = config_manager.snapshot()
+    current = state.snapshot()
+    system_prompt = snap.prompt("chat_system").render(
+        location=current['LOCATION'],
+        min_area=current['MIN_AREA'],
+        interval=current['INTERVAL'],
+        status='Běží' if current['RUNNING'] else 'Zastaven'
     )
 
     try:
-        response = requests.post(
-            f"{AI_ANALYZER_URL}/analyze",
-            json={
+        status, data = call_service(
+            "ai-analyzer", "/analyze",
+            {
                 "prompt": user_message,
                 "context": system_prompt,
-                "model": agent_config.get("model", "gpt-4o"),
+                "model": snap.model,
                 "temperature": 0.5
             },
             timeout=30
         )
-        if response.status_code == 200:
-            return response.json().get("analysis", "Chyba komunikace.")
+        if status == 200:
+            return data.get("analysis", "Chyba komunikace.")
         return "Chyba AI služby."
     except Exception as e:
         return f"Chyba: {e}"
@@ -234,187 +549,269 @@ def analyze_custom_query(listings, user_query, location):
     # Připravit text nabídek
     listings_text = "\n".join([
         f"- {item.get('text', 'N/A')} [{item.get('url', '')}]" 
-        for item in listings[:50]
+        for item in listings[:MAX_PROMPT_LISTINGS]
     ])
     
-    prompt_template = agent_config.get("prompts", {}).get("analyze_custom_query", """Mám následující seznam nabídek pronájmu bytů v lokalitě {location}:
-
-{listings_text}
-
-Uživatel se ptá: "{user_query}"
-
-Odpověz uživateli přímo na jeho otázku na základě poskytnutých dat. Buď stručný a věcný.""")
-
-    prompt = prompt_template.format(
+    snap = config_manager.snapshot()
+    prompt = snap.prompt("analyze_custom_query").render(
         location=location,
         listings_text=listings_text,
         user_query=user_query
     )
 
     try:
-        response = requests.post(
-            f"{AI_ANALYZER_URL}/analyze",
-            json={
+        status, data = call_service(
+            "ai-analyzer", "/analyze",
+            {
                 "prompt": prompt,
-                "model": agent_config.get("model", "gpt-4o"),
+                "model": snap.model,
                 "temperature": 0.2,
                 "max_tokens": 1000
             },
             timeout=120
         )
         
-        if response.status_code == 200:
-            data = response.json()
+        if status == 200:
             return data.get("analysis", "Analýza selhala.")
         else:
-            return f"Chyba AI služby: {response.status_code}"
+            return f"Chyba AI služby: {status}"
     except Exception as e:
         return f"Chyba při volání AI služby: {e}"
 
-def run_api_server():
-    app.run(host='0.0.0.0', port=5005, debug=False, use_reloader=False)
+def answer_from_result(result, user_query):
+    """Odpověď na dotaz z uloženého výsledku cyklu (krátký prompt bez nabídek)"""
+    snap = config_manager.snapshot()
+    prompt = snap.prompt("answer_from_result").render(
+        location=result["location"],
+        analysis=result["analysis"],
+        user_query=user_query,
+        age_minutes=int((time.time() - result["created_at"]) / 60)
+    )
 
-def scrape_listings_with_params(location):
-    """Volá scraper service pro získání nabídek (s parametrem)"""
-    # Načtení URL šablon ze souboru sources.json
     try:
-        with open("sources.json", "r", encoding="utf-8") as f:
-            url_templates = json.load(f)
-    except FileNotFoundError:
-        print("Soubor sources.json nenalezen, používám výchozí nastavení.")
-        url_templates = [
-            "https://www.sreality.cz/hledani/pronajem/byty?region={location}",
-            "https://www.bezrealitky.cz/vypis/nabidka-pronajem/byt/{location}",
-            "https://reality.idnes.cz/s/pronajem/byty/{location}/",
-            "https://reality.bazos.cz/inzeraty/{location}-byt/"
-        ]
+        status, data = call_service(
+            "ai-analyzer", "/analyze",
+            {
+                "prompt": prompt,
+                "model": snap.model,
+                "temperature": 0.2,
+                "max_tokens": 1000
+            },
+            timeout=60
+        )
+        if status == 200:
+            return data.get("analysis", result["analysis"])
     except Exception as e:
-        print(f"Chyba při načítání sources.json: {e}")
-        return []
+        print(f"Chyba při volání AI služby: {e}")
+    # Bez AI vrátíme alespoň uloženou analýzu
+    return result["analysis"]
+
+def run_api_server():
+    app.run(host='0.0.0.0', port=5005, debug=False, use_reloader=False)
 
-    # Nahrazení {location} v URL
-    urls = [url.format(location=location) for url in url_templates]
+def iter_scrape_records(urls, keywords, timeout):
+    """
+    Záznamy scraperu jako (typ, záznam), nabídky jako kompaktní Listing - v embedded režimu
+    přímo z generátoru služby, jinak ze streamu (msgpack nebo NDJSON, případně gzip)
+    nebo z jednoho JSON u staršího scraperu bez streamování.
+    """
+    if "scraper" in embedded:
+        yield from embedded.iter_scrape(urls, keywords)
+        return
     
-    try:
-        response = requests.post(
-            f"{SCRAPER_URL}/scrape",
-            json={
-                "urls": urls,
-                "keywords": agent_config.get("keywords", ["byt"])
-            },
-            timeout=30
-        )
+    response = http.post(
+        f"{SCRAPER_URL}/scrape",
+        json={
+            "urls": urls,
+            "keywords": keywords,
+            "stream": True
+        },
+        headers={"Accept": MSGPACK_TYPE if SCRAPER_FORMAT == "msgpack" else NDJSON_TYPE},
+        timeout=timeout,
+        stream=True
+    )
+    
+    with response:
+        if response.status_code != 200:
+            print(f"Scraper error: {response.status_code}")
+            return
         
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("listings", [])
+        content_type = response.headers.get("Content-Type", "")
+        if MSGPACK_TYPE in content_type:
+            yield from iter_msgpack_records(response.iter_content(chunk_size=None))
+        elif NDJSON_TYPE in content_type:
+            for line in response.iter_lines():
+                if line:
+                    record = json.loads(line)
+                    kind = record.pop("type", "listing")
+                    yield kind, Listing.from_dict(record) if kind == "listing" else record
         else:
-            print(f"Scraper error: {response.status_code}")
-            return []
+            data = response.json()
+            for error in data.get("errors", []):
+                yield "error", error
+            for listing in data.get("listings", []):
+                yield "listing", Listing.from_dict(listing)
+            yield "done", {
+                "count": data.get("count", 0),
+                "pages": data.get("pages", 0),
+                "errors": len(data.get("errors", []))
+            }
+
+def iter_listings(location, cycle=None, summary=None):
+    """
+    Generátor nabídek ze scraperu.
+    Nabídky přichází průběžně, jak scraper dokončuje jednotlivé stránky,
+    takže filtrování a deduplikace běží ještě před dokončením nejpomalejšího portálu.
+    Do summary (pokud je zadán) se na konci streamu zapíše souhrn scraperu (pages, errors, fetched).
+    """
+    # URL šablony ze sources.json (držené v paměti config managerem)
+    snap = config_manager.snapshot()
+    urls = snap.source_urls(location)
+    # Scraper prochází i stránkování se zdvořilostním rozestupem, proto delší timeout
+    # (u streamu platí timeout pro každé čtení, celkový čas hlídá deadline cyklu)
+    timeout = cycle.timeout(120) if cycle else 120
+    seen = set()
+    
+    try:
+        for kind, record in iter_scrape_records(urls, snap.keywords, timeout):
+            if cycle:
+                cycle.check()
+            if kind == "error" or "error" in record:
+                print(f"Zdroj {record.get('source')} nedostupný: {record.get('error')}")
+                continue
+            if kind == "done" and summary is not None:
+                summary.update(record)
+            if kind != "listing":
+                continue
+            
+            key = (record.get("source"), record.get("url"))
+            if key in seen:
+                continue
+            seen.add(key)
+            yield record
+    except CycleCancelled:
+        raise
     except Exception as e:
         print(f"Error calling scraper service: {e}")
-        return []
+
+def scrape_listings_with_params(location, cycle=None, limit=None):
+    """Volá scraper service pro získání nabídek (s parametrem), limit ukončí stream předčasně"""
+    return list(islice(iter_listings(location, cycle), limit))
 
 def scrape_listings():
-    return scrape_listings_with_params(config['LOCATION'])
+    return scrape_listings_with_params(state.get('LOCATION'))
 
-def analyze_listings_with_params(listings, location, min_area):
+def analyze_listings_with_params(listings, location, min_area, cycle=None):
     """Volá AI analyzer service pro analýzu nabídek (s parametry)"""
+    return request_listings_analysis(listings, location, min_area, cycle)[0]
+
+def request_listings_analysis(listings, location, min_area, cycle=None):
+    """Analýza nabídek, vrací (text, úspěch, model)"""
     if not listings:
-        return "Žádné nabídky k analýze."
+        return "Žádné nabídky k analýze.", False, None
     
     # Připravit text nabídek
     listings_text = "\n".join([
         f"- {item.get('text', 'N/A')} [{item.get('url', '')}]" 
-        for item in listings[:50]  # omezit na 50 nabídek
+        for item in listings[:MAX_PROMPT_LISTINGS]
     ])
     
-    prompt_template = agent_config.get("prompts", {}).get("analyze_listings", """Vyber nejlepší nabídky pronájmu bytů v {location} z následujícího seznamu:
-
-{listings_text}
-
-Kritéria: 
-- Plocha alespoň {min_area} m²
-- Vhodné pro dlouhodobý pronájem
-- Přijatelná cena
-
-Vrať stručný seznam TOP 5 nejlepších nabídek s odůvodněním.""")
-
-    prompt = prompt_template.format(
+    snap = config_manager.snapshot()
+    prompt = snap.prompt("analyze_listings").render(
         location=location,
         listings_text=listings_text,
         min_area=min_area
     )
     
+    timeout = cycle.timeout(120) if cycle else 120
+    
     try:
-        response = requests.post(
-            f"{AI_ANALYZER_URL}/analyze",
-            json={
+        status, data = call_service(
+            "ai-analyzer", "/analyze",
+            {
                 "prompt": prompt,
-                "model": agent_config.get("model", "gpt-4o"),
+                "model": snap.model,
                 "temperature": 0.2,
                 "max_tokens": 1000
             },
-            timeout=120
+            timeout=timeout
         )
         
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("analysis", "Analýza selhala.")
+        if status == 200:
+            if "analysis" not in data:
+                return "Analýza selhala.", False, snap.model
+            return data["analysis"], True, data.get("model", snap.model)
         else:
-            print(f"AI Analyzer error: {response.status_code}")
-            return f"Nalezeno {len(listings)} nabídek, ale analýza selhala."
+            print(f"AI Analyzer error: {status}")
+            return f"Nalezeno {len(listings)} nabídek, ale analýza selhala.", False, snap.model
     except Exception as e:
         print(f"Error calling AI analyzer service: {e}")
-        return f"Nalezeno {len(listings)} nabídek:\n\n{listings_text[:1000]}"
+        return f"Nalezeno {len(listings)} nabídek:\n\n{listings_text[:1000]}", False, snap.model
 
 def analyze_listings(listings):
-    return analyze_listings_with_params(listings, config['LOCATION'], config['MIN_AREA'])
+    current = state.snapshot()
+    return analyze_listings_with_params(listings, current['LOCATION'], current['MIN_AREA'])
 
-def send_email(subject, body):
-    """Volá email service pro odeslání e-mailu"""
+def send_email(subject, body, to=None):
+    """Volá email service pro odeslání e-mailu, vrací None nebo text chyby"""
     try:
-        response = requests.post(
-            f"{EMAIL_URL}/send",
-            json={
-                "to": EMAIL_RECEIVER,
+        status, data = call_service(
+            "email", "/send",
+            {
+                "to": to or EMAIL_RECEIVER,
                 "subject": subject,
                 "body": body
             },
             timeout=30
         )
         
-        if response.status_code == 200:
-            print("E-mail odeslán.")
-        else:
-            print(f"Email service error: {response.status_code}")
+        if status == 200:
+            print(f"E-mail odeslán ({to or EMAIL_RECEIVER}).")
+            return None
+        print(f"Email service error: {status}")
+        return data.get("error") or f"HTTP {status}"
     except Exception as e:
         print(f"Error calling email service: {e}")
+        return str(e)
 
-def send_whatsapp_message(body):
-    """Volá WhatsApp service pro odeslání zprávy"""
+def send_whatsapp_message(body, to=None):
+    """Volá WhatsApp service pro odeslání zprávy, vrací None nebo text chyby"""
     try:
-        response = requests.post(
-            f"{WHATSAPP_URL}/send",
-            json={
-                "to": USER_WHATSAPP_NUMBER,
+        status, data = call_service(
+            "whatsapp", "/send",
+            {
+                "to": to or USER_WHATSAPP_NUMBER,
                 "message": body
             },
             timeout=30
         )
         
-        if response.status_code == 200:
-            print("WhatsApp zpráva odeslána.")
-        else:
-            print(f"WhatsApp service error: {response.status_code}")
+        if status == 200:
+            print(f"WhatsApp zpráva odeslána ({to or USER_WHATSAPP_NUMBER}).")
+            return None
+        print(f"WhatsApp service error: {status}")
+        return data.get("error") or f"HTTP {status}"
     except Exception as e:
         print(f"Error calling WhatsApp service: {e}")
-
-def run_cycle(overrides=None):
-    """Jeden cyklus vyhledávání"""
-    # Použít overrides nebo globální config
-    current_location = overrides.get("location", config["LOCATION"]) if overrides else config["LOCATION"]
-    current_min_area = int(overrides.get("min_area", config["MIN_AREA"])) if overrides and "min_area" in overrides else config["MIN_AREA"]
+        return str(e)
+
+# Rozesílání odběratelům - souběžné doručení přes notifikační služby
+notifier = Notifier(
+    subscribers,
+    senders={
+        "email": lambda sub, subject, body: send_email(subject, body, to=sub["email"]),
+        "whatsapp": lambda sub, subject, body: send_whatsapp_message(body, to=sub["whatsapp"])
+    },
+    concurrency=int(os.getenv("NOTIFY_CONCURRENCY", 8))
+)
+
+def run_cycle(overrides=None, cycle=None):
+    """Jeden cyklus vyhledávání (cycle = CycleContext plánovače pro zrušení a deadline)"""
+    # Použít overrides nebo snímek stavu (konzistentní po celou dobu cyklu)
+    current = state.snapshot()
+    overrides = overrides or {}
+    current_location = overrides.get("location", current["LOCATION"])
+    current_min_area = int(overrides.get("min_area", current["MIN_AREA"]))
     
     print("\n" + "="*50)
     print(f"Spouštím cyklus vyhledávání pro {current_location} (min {current_min_area} m²)...")
@@ -422,51 +819,176 @@ def run_cycle(overrides=None):
     
     # Krok 1: Scraping
     print("1. Scrapování nabídek...")
-    # Dočasná úprava scrape_listings pro podporu parametrů
-    listings = scrape_listings_with_params(current_location)
+    # Nabídky se zpracovávají průběžně ze streamu - pro AI se drží jen prvních
+    # MAX_PROMPT_LISTINGS, ostatní se jen započítají (adaptivní interval si klíče vede sám)
+    listings = []
+    found = 0
+    timings = {}
+    cycle_started = time.monotonic()
+    def observe(stream):
+        nonlocal found
+        for item in stream:
+            found += 1
+            if len(listings) < MAX_PROMPT_LISTINGS:
+                listings.append(item)
+            yield item
+    
+    # Přírůstek nových nabídek pro adaptivní interval (rozpočet podle skutečně stažených stránek)
+    scrape_summary = {}
+    interval, reason = adaptive.record_cycle(
+        current_location, observe(iter_listings(current_location, cycle, scrape_summary)),
+        current["INTERVAL"], scrape_summary
+    )
+    timings["scrape"] = round(time.monotonic() - cycle_started, 3)
+    if current["ADAPTIVE"]:
+        print(f"Adaptivní interval: {interval} s ({reason})")
     
     if listings:
-        print(f"✓ Nalezeno {len(listings)} nabídek.")
+        print(f"✓ Nalezeno {found} nabídek.")
         
         # Krok 2: AI Analýza
         print("2. Analýza pomocí AI...")
-        analysis = analyze_listings_with_params(listings, current_location, current_min_area)
+        step_started = time.monotonic()
+        analysis, analysis_ok, model = request_listings_analysis(listings, current_location, current_min_area, cycle)
+        timings["analyze"] = round(time.monotonic() - step_started, 3)
         print(f"✓ Analýza dokončena.")
         
-        # Krok 3: Odeslání e-mailu
-        print("3. Odesílání e-mailu...")
-        send_email(
+        # Zrušený cyklus už nic neodesílá ani neukládá
+        if cycle:
+            cycle.check()
+        
+        timings["total"] = round(time.monotonic() - cycle_started, 3)
+        # Ukládají se jen analyzované nabídky (absolutní URL), počet je celkový
+        listing_ids = [urljoin(item.get("source") or "", item["url"]) for item in listings if item.get("url")]
+        result_id = results.save(
+            location=current_location,
+            min_area=current_min_area,
+            status="completed" if analysis_ok else "analysis_failed",
+            model=model,
+            listing_ids=listing_ids,
+            listing_count=found,
+            analysis=analysis,
+            timings=timings
+        )
+        print(f"✓ Výsledek uložen (#{result_id}).")
+        
+        # Krok 3: Rozeslání odběratelům (e-mail, WhatsApp) - analýza se vytváří jen jednou
+        print("3. Rozesílání odběratelům...")
+        delivery = notifier.fan_out(
+            current_location,
             subject=f"Aktuální nabídky pronájmu v {current_location}",
             body=analysis
         )
-        
-        # Krok 4: Odeslání WhatsApp zprávy
-        print("4. Odesílání WhatsApp zprávy...")
-        send_whatsapp_message(analysis)
+        print(f"✓ Doručeno {delivery['deliveries'] - delivery['failed']}/{delivery['deliveries']}"
+              f" (klidové hodiny: {delivery['suppressed_quiet_hours']}).")
         
         print("✓ Cyklus dokončen.")
     else:
+        timings["total"] = round(time.monotonic() - cycle_started, 3)
+        results.save(
+            location=current_location,
+            min_area=current_min_area,
+            status="no_listings",
+            model=None,
+            listing_ids=[],
+            analysis=None,
+            timings=timings
+        )
         print("✗ Žádné nabídky nenalezeny.")
 
+def prewarm_services(timeout=60, connections=2):
+    """
+    Před prvním cyklem otevře pooled spojení na HTTP služby (souběžná volání /ready)
+    a počká, až budou připravené. Po vypršení timeoutu agent pokračuje i bez nich.
+    Nenakonfigurovaná služba (configured: false) se nečeká - to je trvalý stav.
+    Služby v embedded režimu se přeskočí.
+    """
+    print("Pre-warm: ověřuji připravenost služeb...")
+    deadline = time.monotonic() + timeout
+    pending = {name: url for name, url in SERVICES.items() if name not in embedded}
+    
+    def probe(url):
+        """Vrací (chyba nebo None, latence, nakonfigurováno)"""
+        started = time.monotonic()
+        configured = True
+        try:
+            response = http.get(f"{url}/ready", timeout=5)
+            data = response.json() if "application/json" in response.headers.get("Content-Type", "") else {}
+            configured = data.get("configured", True)
+            if response.status_code != 200:
+                error = data.get("error") or f"HTTP {response.status_code}"
+            else:
+                error = None if configured else data.get("error") or "not configured"
+        except Exception as e:
+            error = str(e)
+        return error, time.monotonic() - started, configured
+    
+    with ThreadPoolExecutor(max_workers=max(1, connections) * len(SERVICES)) as pool:
+        while pending:
+            futures = {
+                name: [pool.submit(probe, url) for _ in range(max(1, connections))]
+                for name, url in pending.items()
+            }
+            for name, probes in futures.items():
+                outcomes = [f.result() for f in probes]
+                errors = [error for error, _, _ in outcomes if error]
+                configured = all(ok for _, _, ok in outcomes)
+                service_readiness[name] = {
+                    "mode": "http",
+                    "ready": not errors,
+                    "configured": configured,
+                    "latency": round(min(latency for _, latency, _ in outcomes), 3),
+                    "error": errors[0] if errors else None,
+                    "checked_at": time.time()
+                }
+                if not errors or not configured:
+                    pending.pop(name)
+            if not pending or time.monotonic() >= deadline:
+                break
+            time.sleep(1)
+    
+    for name, info in service_readiness.items():
+        if info["mode"] == "embedded":
+            print(f"  ✓ {name} (embedded)")
+            continue
+        mark = "✓" if info["ready"] else ("-" if not info["configured"] else "✗")
+        print(f"  {mark} {name} ({info['latency']} s){'' if info['ready'] else ' - ' + str(info['error'])}")
+
+# Plánovač cyklů (časovač, ruční spuštění, zrušení, deadline cyklu)
+scheduler = Scheduler(
+    state, run_cycle,
+    cycle_timeout=int(os.getenv("CYCLE_TIMEOUT", 900)),
+    interval_fn=lambda: next_interval()[0]
+)
+
 def run_agent():
     """Hlavní smyčka agenta - orchestrace mikroslužeb"""
     print(f"Real Estate Agent spuštěn.")
     print(f"API server běží na portu 5005")
     
+    # Sledování změn agent_config.json a sources.json
+    config_manager.start_watching()
+    
     # Spuštění API serveru v samostatném vlákně
     api_thread = threading.Thread(target=run_api_server)
     api_thread.daemon = True
     api_thread.start()
     
-    while True:
-        if config["RUNNING"]:
-            run_cycle()
-        else:
-            print("Agent je pozastaven.")
-        
-        # Spánek podle intervalu
-        print(f"\nČekám {config['INTERVAL']} sekund do dalšího cyklu...")
-        time.sleep(config['INTERVAL'])
+    # Ukončení procesu (docker stop, Ctrl+C) zruší běžící cyklus a ukončí plánovač
+    def handle_shutdown(signum, frame):
+        print("Ukončuji agenta...")
+        scheduler.shutdown()
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    signal.signal(signal.SIGINT, handle_shutdown)
+    
+    # Volitelný pre-warm: spojení na služby a ověření připravenosti před prvním cyklem
+    if os.getenv("PREWARM", "false").lower() in ("1", "true", "yes"):
+        prewarm_services(
+            timeout=int(os.getenv("PREWARM_TIMEOUT", 60)),
+            connections=int(os.getenv("PREWARM_CONNECTIONS", 2))
+        )
+    
+    scheduler.run()
 
 if __name__ == "__main__":
     run_agent()
@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import string
+import threading
+
+# Výchozí prompty (použijí se, pokud chybí v agent_config.json)
+DEFAULT_PROMPTS = {
+    "interpret_intent": """Jsi řídicí systém pro realitního agenta. Tvým úkolem je klasifikovat vstup uživatele.
+Dostupné příkazy:
+- UPDATE_CONFIG: Uživatel chce TRVALE změnit nastavení (slova jako "nastav", "změň", "odteď").
+- START: Spustit agenta.
+- STOP: Zastavit agenta.
+- SEARCH: Uživatel VÝSLOVNĚ žádá o nové vyhledání, stažení dat nebo průzkum trhu (slova jako "najdi", "vyhledej", "koukni se", "co je nového", "udělej sken").
+- CHAT: Vše ostatní. Běžná konverzace, dotazy na aktuální nastavení, nebo obecné dotazy, které NEVYŽADUJÍ stahování nových dat (např. "jaké je nastavení?", "ahoj", "co umíš?", "napiš mi básničku").
+
+Parametry: location (string), min_area (int), interval (int).
+
+Příklad 1: "Nastav lokalitu na Brno" -> {"command": "UPDATE_CONFIG", "parameters": {"location": "Brno"}}
+Příklad 2: "Najdi mi byty v Praze" -> {"command": "SEARCH", "parameters": {"location": "Praha"}}
+Příklad 3: "Jaké je tvé nastavení?" -> {"command": "CHAT", "parameters": {}}
+Příklad 4: "Vypiš mi krátké shrnutí jak vypadá trh" -> {"command": "SEARCH", "parameters": {}} (implikuje potřebu dat)
+Příklad 5: "Ahoj" -> {"command": "CHAT", "parameters": {}}
+
+Vrať POUZE validní JSON bez dalšího textu.""",
+    "chat_system": """Jsi realitní agent.
+Aktuální konfigurace:
+- Lokalita: {location}
+- Min. plocha: {min_area} m2
+- Interval: {interval} s
+- Stav: {status}
+
+Odpovídej na dotazy uživatele.
+Pokud se uživatel ptá na konkrétní nabídky nebo aktuální stav trhu, UPOZORNI HO, že nemáš aktuální data a musí použít příkaz "najdi" nebo "vyhledej", aby jsi provedl nový průzkum.""",
+    "analyze_listings": """Vyber nejlepší nabídky pronájmu bytů v {location} z následujícího seznamu:
+
+{listings_text}
+
+Kritéria:
+- Plocha alespoň {min_area} m²
+- Vhodné pro dlouhodobý pronájem
+- Přijatelná cena
+
+Vrať stručný seznam TOP 5 nejlepších nabídek s odůvodněním.""",
+    "analyze_custom_query": """Mám následující seznam nabídek pronájmu bytů v lokalitě {location}:
+
+{listings_text}
+
+Uživatel se ptá: "{user_query}"
+
+Odpověz uživateli přímo na jeho otázku na základě poskytnutých dat. Buď stručný a věcný.""",
+    "answer_from_result": """Před {age_minutes} minutami jsem provedl vyhledávání pronájmů bytů v lokalitě {location} s tímto výsledkem:
+
+{analysis}
+
+Uživatel se ptá: "{user_query}"
+
+Odpověz uživateli přímo na základě tohoto výsledku. Buď stručný a věcný. Uveď, jak jsou data stará, a že pro nové vyhledání může použít příkaz "najdi znovu"."""
+}
+
+# Povolené placeholdery pro jednotlivé prompty (None = prompt se neformátuje)
+PROMPT_FIELDS = {
+    "interpret_intent": None,
+    "chat_system": {"location", "min_area", "interval", "status"},
+    "analyze_listings": {"location", "listings_text", "min_area"},
+    "analyze_custom_query": {"location", "listings_text", "user_query"},
+    "answer_from_result": {"location", "analysis", "user_query", "age_minutes"}
+}
+
+DEFAULT_SOURCES = [
+    "https://www.sreality.cz/hledani/pronajem/byty?region={location}",
+    "https://www.bezrealitky.cz/vypis/nabidka-pronajem/byt/{location}",
+    "https://reality.idnes.cz/s/pronajem/byty/{location}/",
+    "https://reality.bazos.cz/inzeraty/{location}-byt/"
+]
+
+
+class PromptTemplate:
+    """Předkompilovaná šablona promptu (rozparsovaná jednou při načtení)"""
+
+    def __init__(self, name, text, allowed_fields):
+        self.name = name
+        self.text = text
+        self._parts = None
+        if allowed_fields is None:
+            return
+
+        parts = []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            if field is not None:
+                if field not in allowed_fields:
+                    raise ValueError(f"prompt '{name}': neznámý placeholder {{{field}}}")
+                if spec or conversion:
+                    raise ValueError(f"prompt '{name}': formátovací specifikace nejsou podporovány")
+            parts.append((literal, field))
+        self._parts = parts
+
+    def render(self, **values):
+        if self._parts is None:
+            return self.text
+        return "".join(
+            literal + (str(values[field]) if field is not None else "")
+            for literal, field in self._parts
+        )
+
+
+class ConfigSnapshot:
+    """Neměnný snímek konfigurace - po vytvoření se nemění, pouze se celý vymění"""
+
+    def __init__(self, version, agent_config, sources, prompts, mtimes):
+        self.version = version
+        self.agent_config = agent_config
+        self.sources = sources
+        self.prompts = prompts
+        self.mtimes = mtimes
+        self.loaded_at = time.time()
+
+    @property
+    def model(self):
+        return self.agent_config.get("model", "gpt-4o")
+
+    @property
+    def keywords(self):
+        return self.agent_config.get("keywords", ["byt"])
+
+    def prompt(self, name):
+        return self.prompts[name]
+
+    def source_urls(self, location):
+        return [url.format(location=location) for url in self.sources]
+
+
+def validate_agent_config(data):
+    """Ověří strukturu agent_config.json, při chybě vyhodí ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("agent_config.json musí obsahovat JSON objekt")
+    if "model" in data and not isinstance(data["model"], str):
+        raise ValueError("model musí být řetězec")
+    keywords = data.get("keywords", [])
+    if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+        raise ValueError("keywords musí být seznam řetězců")
+    prompts = data.get("prompts", {})
+    if not isinstance(prompts, dict):
+        raise ValueError("prompts musí být objekt")
+    for name, text in prompts.items():
+        if name not in PROMPT_FIELDS:
+            raise ValueError(f"neznámý prompt '{name}'")
+        if not isinstance(text, str):
+            raise ValueError(f"prompt '{name}' musí být řetězec")
+
+
+def validate_sources(data):
+    """Ověří strukturu sources.json, při chybě vyhodí ValueError"""
+    if not isinstance(data, list) or not data:
+        raise ValueError("sources.json musí obsahovat neprázdný seznam URL")
+    for url in data:
+        if not isinstance(url, str) or not url.startswith(("http://", "https://")):
+            raise ValueError(f"neplatná URL šablona: {url!r}")
+        for _, field, _, _ in string.Formatter().parse(url):
+            if field is not None and field != "location":
+                raise ValueError(f"URL šablona smí obsahovat pouze {{location}}: {url}")
+
+
+def compile_prompts(agent_config):
+    prompts = {}
+    overrides = agent_config.get("prompts", {})
+    for name, allowed_fields in PROMPT_FIELDS.items():
+        prompts[name] = PromptTemplate(name, overrides.get(name, DEFAULT_PROMPTS[name]), allowed_fields)
+    return prompts
+
+
+class ConfigManager:
+    """
+    Drží agent_config.json a sources.json v paměti a sleduje jejich změny.
+
+    Hot path (cyklus, /prompt) volá pouze snapshot(), žádné I/O.
+    Watcher na pozadí kontroluje mtime souborů; při změně soubory načte,
+    zvaliduje, předkompiluje prompty a atomicky vymění snímek. Nevalidní
+    soubor se ignoruje a zůstává předchozí platná konfigurace.
+    """
+
+    def __init__(self, agent_config_path="config/agent_config.json", sources_path="config/sources.json", poll_interval=2.0):
+        self.agent_config_path = agent_config_path
+        self.sources_path = sources_path
+        self.poll_interval = poll_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._snapshot = ConfigSnapshot(0, {}, list(DEFAULT_SOURCES), compile_prompts({}), {})
+        self.reload(force=True)
+
+    def snapshot(self):
+        return self._snapshot
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read_json(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def reload(self, force=False):
+        """Znovu načte soubory, pokud se změnily. Vrací True při výměně snímku."""
+        with self._lock:
+            current = self._snapshot
+            mtimes = {
+                self.agent_config_path: self._mtime(self.agent_config_path),
+                self.sources_path: self._mtime(self.sources_path)
+            }
+            if not force and mtimes == current.mtimes:
+                return False
+
+            try:
+                if mtimes[self.agent_config_path] is not None:
+                    agent_config = self._read_json(self.agent_config_path)
+                    validate_agent_config(agent_config)
+                else:
+                    print(f"Soubor {self.agent_config_path} nenalezen, používám výchozí nastavení.")
+                    agent_config = {}
+
+                if mtimes[self.sources_path] is not None:
+                    sources = self._read_json(self.sources_path)
+                    validate_sources(sources)
+                else:
+                    print(f"Soubor {self.sources_path} nenalezen, používám výchozí nastavení.")
+                    sources = list(DEFAULT_SOURCES)
+
+                prompts = compile_prompts(agent_config)
+            except Exception as e:
+                # Ponecháme předchozí platnou konfiguraci, změnu mtime si zapamatujeme,
+                # aby se stejná chyba nevypisovala při každém průchodu watcheru
+                print(f"Chyba při načítání konfigurace: {e}")
+                self.last_error = str(e)
+                self._snapshot = ConfigSnapshot(
+                    current.version, current.agent_config, current.sources, current.prompts, mtimes
+                )
+                return False
+
+            self._snapshot = ConfigSnapshot(current.version + 1, agent_config, sources, prompts, mtimes)
+            self.last_error = None
+            if current.version:
+                print(f"Konfigurace znovu načtena (verze {self._snapshot.version}).")
+            return True
+
+    def start_watching(self):
+        if self._watcher:
+            return
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Chyba watcheru konfigurace: {e}")
+
+    def status(self):
+        snap = self._snapshot
+        return {
+            "version": snap.version,
+            "loaded_at": snap.loaded_at,
+            "model": snap.model,
+            "sources": len(snap.sources),
+            "last_error": self.last_error
+        }
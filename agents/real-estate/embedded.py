@@ -0,0 +1,72 @@
+import os
+import sys
+import importlib.util
+
+SERVICE_NAMES = ("scraper", "ai-analyzer", "email", "whatsapp")
+
+# Jádra endpointů služeb: funkce (data, timeout) -> (odpověď, HTTP status), sdílené s Flask routami
+ROUTES = {
+    "ai-analyzer": {"/analyze": "analyze_request"},
+    "email": {"/send": "send_request"},
+    "whatsapp": {"/send": "send_request"}
+}
+
+
+def parse_embedded(value):
+    """'scraper,ai-analyzer' / 'all' / '' -> množina služeb, které běží v procesu agenta"""
+    names = {name.strip() for name in (value or "").split(",") if name.strip()}
+    if "all" in names:
+        return set(SERVICE_NAMES)
+    unknown = names - set(SERVICE_NAMES)
+    if unknown:
+        raise ValueError(f"neznámé služby v EMBEDDED_SERVICES: {', '.join(sorted(unknown))} (povolené: {', '.join(SERVICE_NAMES)})")
+    return names
+
+
+class EmbeddedServices:
+    """
+    Služby načtené přímo do procesu agenta (embedded režim).
+
+    Načítá se stejný services/<služba>/app.py jako v kontejneru služby,
+    agent ale místo HTTP volá jádro endpointu přímo - bez serializace a síťového skoku.
+    Služby, které tu nejsou, agent dál volá přes HTTP.
+    """
+
+    def __init__(self, names, services_dir):
+        self.services_dir = services_dir
+        self.modules = {name: self._load(name) for name in sorted(names)}
+
+    def _load(self, name):
+        service_dir = os.path.join(self.services_dir, name)
+        path = os.path.join(service_dir, "app.py")
+        if not os.path.exists(path):
+            raise RuntimeError(f"služba {name} nenalezena ({path}), nastavte SERVICES_DIR")
+        # Pomocné moduly služby (např. frontier.py scraperu) se importují bez balíčku,
+        # jejich názvy proto nesmí kolidovat s moduly agenta (výjimkou jsou profiling.py
+        # a wire_format.py ze services/common, které agent i služby sdílí)
+        if service_dir not in sys.path:
+            sys.path.append(service_dir)
+        module_name = f"service_{name.replace('-', '_')}"
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        print(f"Služba {name} běží v procesu agenta ({path}).")
+        return module
+
+    def __contains__(self, name):
+        return name in self.modules
+
+    def call(self, name, path, payload, timeout=None):
+        """Zavolá jádro endpointu služby, vrací (HTTP status, odpověď) jako přes HTTP"""
+        handler = getattr(self.modules[name], ROUTES[name][path])
+        body, status = handler(payload, timeout=timeout)
+        return status, body
+
+    def iter_scrape(self, urls, keywords, max_pages=None):
+        """Průběžné výsledky scraperu ("listing"|"error"|"done", záznam) bez NDJSON"""
+        scraper = self.modules["scraper"]
+        return scraper.iter_scrape(urls, keywords, max_pages or scraper.CRAWL_MAX_PAGES)
+
+    def status(self):
+        return {name: {"mode": "embedded"} for name in self.modules}
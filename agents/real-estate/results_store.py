@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    location TEXT NOT NULL,
+    min_area INTEGER,
+    status TEXT NOT NULL,
+    model TEXT,
+    listing_count INTEGER NOT NULL,
+    listing_ids TEXT NOT NULL,
+    analysis TEXT,
+    timings TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_location ON results (location, created_at);
+"""
+
+
+class ResultStore:
+    """
+    Historie výsledků cyklů v SQLite (vstupní nabídky, analýza, model, časy).
+
+    Každá operace si otevře vlastní spojení, takže úložiště lze bezpečně
+    používat z vláken Flasku i z plánovače.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:  # commit / rollback
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_dict(row, with_listings=False):
+        result = {
+            "id": row["id"],
+            "created_at": row["created_at"],
+            "location": row["location"],
+            "min_area": row["min_area"],
+            "status": row["status"],
+            "model": row["model"],
+            "listing_count": row["listing_count"],
+            "analysis": row["analysis"],
+            "timings": json.loads(row["timings"])
+        }
+        if with_listings:
+            result["listing_ids"] = json.loads(row["listing_ids"])
+        return result
+
+    def save(self, location, min_area, status, model, listing_ids, analysis, timings, listing_count=None):
+        """listing_ids jsou analyzované nabídky, listing_count celkový počet nalezených (výchozí len(listing_ids))"""
+        if listing_count is None:
+            listing_count = len(listing_ids)
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO results (created_at, location, min_area, status, model, listing_count,"
+                " listing_ids, analysis, timings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), location, min_area, status, model, listing_count,
+                 json.dumps(listing_ids, ensure_ascii=False), analysis, json.dumps(timings))
+            )
+            return cursor.lastrowid
+
+    def list(self, limit=20, offset=0, location=None):
+        """Stránkovaný výpis od nejnovějších, vrací (výsledky, celkový počet)"""
+        where, args = ("WHERE location = ?", [location]) if location else ("", [])
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM results {where}", args).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM results {where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                args + [limit, offset]
+            ).fetchall()
+        return [self._to_dict(row) for row in rows], total
+
+    def get(self, result_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM results WHERE id = ?", (result_id,)).fetchone()
+        return self._to_dict(row, with_listings=True) if row else None
+
+    def latest(self, location, max_age):
+        """Nejnovější úspěšný výsledek pro lokalitu, pokud není starší než max_age sekund"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM results WHERE location = ? AND status = 'completed' AND created_at >= ?"
+                " ORDER BY id DESC LIMIT 1",
+                (location, time.time() - max_age)
+            ).fetchone()
+        return self._to_dict(row) if row else None
@@ -0,0 +1,188 @@
+import time
+import threading
+
+
+class CycleCancelled(Exception):
+    """Cyklus byl zrušen (uživatelem, zastavením agenta nebo po deadlinu)"""
+
+
+class CycleContext:
+    """
+    Kontext jednoho běžícího cyklu - předává se do kroků cyklu.
+
+    Zrušení je kooperativní: kroky volají check() mezi sebou a timeout()
+    pro HTTP volání, aby žádné volání nepřesáhlo deadline cyklu.
+    """
+
+    def __init__(self, cycle_id, reason, overrides, max_duration):
+        self.id = cycle_id
+        self.reason = reason
+        self.overrides = overrides or {}
+        self.started_at = time.time()
+        self.deadline = time.monotonic() + max_duration
+        self.status = "running"
+        self.cancel_reason = None
+        self.finished_at = None
+        self._cancelled = threading.Event()
+
+    def cancel(self, reason="cancelled"):
+        if not self._cancelled.is_set():
+            self.cancel_reason = reason
+            self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+    def check(self):
+        if self.remaining() <= 0:
+            self.cancel("timeout")
+        if self.cancelled:
+            raise CycleCancelled(self.cancel_reason)
+
+    def timeout(self, default):
+        """Timeout pro HTTP volání oříznutý na zbývající čas cyklu"""
+        self.check()
+        return max(0.1, min(default, self.remaining()))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "reason": self.reason,
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cancel_reason": self.cancel_reason,
+            "overrides": self.overrides
+        }
+
+
+class Scheduler:
+    """
+    Plánovač cyklů řízený událostmi.
+
+    Jedno vlákno (run) čeká na podmínce s timeoutem do nejbližší události
+    (další plánovaný běh nebo deadline běžícího cyklu). Změny stavu
+    (start/stop/interval), ruční spuštění, zrušení i ukončení procesu ho
+    probudí okamžitě. Samotný cyklus běží v samostatném vlákně.
+    """
+
+    def __init__(self, state, run_cycle, cycle_timeout=900, interval_fn=None):
+        self.state = state
+        self.run_cycle = run_cycle
+        self.cycle_timeout = cycle_timeout
+        # Délka čekání po cyklu (výchozí pevný INTERVAL, lze nahradit adaptivním)
+        self.interval_fn = interval_fn or (lambda: self.state.get("INTERVAL"))
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._next_run = time.monotonic()  # první cyklus hned po startu
+        self._pending = None  # ruční požadavek (reason, overrides)
+        self._current = None
+        self._last = None
+        self._last_finished = None
+        self._counter = 0
+        state.subscribe(self._on_state_change)
+
+    def _on_state_change(self, changed):
+        with self._cond:
+            if "RUNNING" in changed:
+                if changed["RUNNING"]:
+                    self._next_run = time.monotonic()
+                elif self._current:
+                    self._current.cancel("stopped")
+            if changed.keys() & {"INTERVAL", "ADAPTIVE", "LOCATION"} and self._last_finished is not None and not self._current:
+                self._next_run = self._last_finished + self.interval_fn()
+            self._cond.notify_all()
+
+    def trigger(self, overrides=None, reason="manual"):
+        """Požádá o okamžitý běh. Vrací False, pokud už cyklus běží."""
+        with self._cond:
+            if self._current or self._pending:
+                return False
+            self._pending = (reason, overrides)
+            self._cond.notify_all()
+            return True
+
+    def cancel(self, reason="cancelled"):
+        """Zruší běžící cyklus. Vrací id zrušeného cyklu nebo None."""
+        with self._cond:
+            if not self._current:
+                return None
+            self._current.cancel(reason)
+            self._cond.notify_all()
+            return self._current.id
+
+    def shutdown(self):
+        with self._cond:
+            self._shutdown = True
+            if self._current:
+                self._current.cancel("shutdown")
+            self._cond.notify_all()
+
+    def _start_cycle(self, reason, overrides):
+        self._counter += 1
+        cycle = CycleContext(self._counter, reason, overrides, self.cycle_timeout)
+        self._current = cycle
+        threading.Thread(target=self._execute, args=(cycle,), daemon=True).start()
+
+    def _execute(self, cycle):
+        try:
+            self.run_cycle(cycle.overrides, cycle)
+            cycle.status = "completed"
+        except CycleCancelled:
+            cycle.status = "timeout" if cycle.cancel_reason == "timeout" else "cancelled"
+            print(f"Cyklus #{cycle.id} přerušen ({cycle.cancel_reason}).")
+        except Exception as e:
+            cycle.status = "failed"
+            print(f"Cyklus #{cycle.id} selhal: {e}")
+        finally:
+            with self._cond:
+                cycle.finished_at = time.time()
+                self._last = cycle
+                self._current = None
+                self._last_finished = time.monotonic()
+                self._next_run = self._last_finished + self.interval_fn()
+                self._cond.notify_all()
+
+    def run(self):
+        """Smyčka plánovače - běží až do shutdown()"""
+        with self._cond:
+            while not self._shutdown:
+                now = time.monotonic()
+
+                if self._current:
+                    # Hlídání deadlinu běžícího cyklu
+                    if self._current.remaining() <= 0:
+                        self._current.cancel("timeout")
+                    self._cond.wait(timeout=max(0.05, self._current.remaining()))
+                    continue
+
+                if self._pending:
+                    reason, overrides = self._pending
+                    self._pending = None
+                    self._start_cycle(reason, overrides)
+                    continue
+
+                if not self.state.get("RUNNING"):
+                    self._cond.wait()
+                    continue
+
+                if now >= self._next_run:
+                    self._start_cycle("interval", None)
+                    continue
+
+                self._cond.wait(timeout=self._next_run - now)
+
+    def status(self):
+        with self._cond:
+            running = self.state.get("RUNNING")
+            next_in = max(0.0, self._next_run - time.monotonic()) if running else None
+            return {
+                "next_run_in": round(next_in, 1) if next_in is not None else None,
+                "next_run_at": time.time() + next_in if next_in is not None else None,
+                "current_cycle": self._current.to_dict() if self._current else None,
+                "last_cycle": self._last.to_dict() if self._last else None
+            }
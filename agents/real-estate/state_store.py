@@ -0,0 +1,102 @@
+import os
+import json
+import threading
+
+
+class VersionConflict(Exception):
+    """Zápis se odkazoval na starší verzi stavu, než je aktuální"""
+
+
+class StateStore:
+    """
+    Sdílený stav agenta (lokalita, plocha, interval, běží/zastaven).
+
+    Všechny přístupy jdou přes zámek: čtení vrací kopii (snímek), zápis
+    atomicky změní více klíčů najednou a zvýší verzi. Každý zápis se
+    ukládá na disk přes dočasný soubor + os.replace, takže pád procesu
+    nezanechá rozepsaný soubor. O změnách se dozvídají odběratelé
+    přes subscribe (např. plánovač přeplánuje cyklus při změně INTERVAL).
+    """
+
+    def __init__(self, path, defaults):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = dict(defaults)
+        self._version = 0
+        self._subscribers = []
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            values = stored.get("state", {})
+            for key in self._state:
+                if key in values:
+                    self._state[key] = values[key]
+            self._version = int(stored.get("version", 0))
+            print(f"Stav agenta obnoven z {self.path} (verze {self._version}).")
+        except Exception as e:
+            print(f"Chyba při načítání stavu agenta z {self.path}: {e}")
+
+    def _persist(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self._version, "state": self._state}, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def subscribe(self, callback):
+        """Zaregistruje callback(changed) volaný po každé změně (mimo zámek)"""
+        self._subscribers.append(callback)
+
+    def snapshot(self):
+        """Konzistentní kopie celého stavu včetně verze"""
+        with self._lock:
+            snap = dict(self._state)
+            snap["VERSION"] = self._version
+            return snap
+
+    def get(self, key):
+        with self._lock:
+            return self._state[key]
+
+    def update(self, expected_version=None, **changes):
+        """
+        Atomicky změní zadané klíče a vrátí nový snímek.
+        Při zadání expected_version se zápis provede jen nad touto verzí.
+        """
+        with self._lock:
+            if expected_version is not None and int(expected_version) != self._version:
+                raise VersionConflict(f"očekávána verze {expected_version}, aktuální je {self._version}")
+            for key in changes:
+                if key not in self._state:
+                    raise KeyError(key)
+
+            changed = {k: v for k, v in changes.items() if self._state[k] != v}
+            if changed:
+                self._version += 1
+                self._state.update(changed)
+                try:
+                    self._persist()
+                except Exception as e:
+                    print(f"Chyba při ukládání stavu agenta: {e}")
+
+            snap = dict(self._state)
+            snap["VERSION"] = self._version
+
+        if changed:
+            for callback in self._subscribers:
+                try:
+                    callback(changed)
+                except Exception as e:
+                    print(f"Chyba při zpracování změny stavu: {e}")
+        return snap
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import shutil
+import uuid
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+CHANNELS = ("email", "whatsapp")
+
+
+def parse_hhmm(value):
+    if not isinstance(value, str) or value.count(":") != 1:
+        raise ValueError(f"čas musí být řetězec HH:MM, ne {value!r}")
+    try:
+        hours, minutes = (int(part) for part in value.split(":"))
+    except ValueError:
+        raise ValueError(f"neplatný čas {value}") from None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"neplatný čas {value}")
+    return hours * 60 + minutes
+
+
+def get_timezone(name):
+    """IANA název časového pásma (např. Europe/Prague) -> ZoneInfo, při chybě ValueError"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        raise ValueError(f"neznámé časové pásmo {name!r}") from None
+
+
+def validate_subscriber(data):
+    """Ověří a normalizuje odběratele, při chybě vyhodí ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("odběratel musí být JSON objekt")
+    if not isinstance(data.get("id") or "", str) or not isinstance(data.get("name") or "", str):
+        raise ValueError("id a name musí být řetězce")
+    channels = data.get("channels", [c for c in CHANNELS if data.get(c)])
+    if not isinstance(channels, list) or not channels or any(channel not in CHANNELS for channel in channels):
+        raise ValueError(f"channels musí být neprázdný seznam z {CHANNELS}")
+    for channel in channels:
+        if not data.get(channel) or not isinstance(data[channel], str):
+            raise ValueError(f"kanál {channel} vyžaduje řetězec v poli '{channel}'")
+    locations = data.get("locations", [])
+    if not isinstance(locations, list) or not all(isinstance(loc, str) for loc in locations):
+        raise ValueError("locations musí být seznam řetězců (prázdný = všechny lokality)")
+    quiet_hours = data.get("quiet_hours")
+    if quiet_hours:
+        if not isinstance(quiet_hours, dict) or "start" not in quiet_hours or "end" not in quiet_hours:
+            raise ValueError("quiet_hours musí mít tvar {\"start\": \"22:00\", \"end\": \"07:00\"}")
+        parse_hhmm(quiet_hours["start"])
+        parse_hhmm(quiet_hours["end"])
+    active = data.get("active", True)
+    if not isinstance(active, bool):
+        raise ValueError("active musí být true/false")
+    timezone = data.get("timezone") or None
+    if timezone is not None:
+        get_timezone(timezone)
+    return {
+        "id": data.get("id") or uuid.uuid4().hex[:8],
+        "name": data.get("name", ""),
+        "email": data.get("email"),
+        "whatsapp": data.get("whatsapp"),
+        "channels": list(channels),
+        "locations": locations,
+        "quiet_hours": quiet_hours or None,
+        "timezone": timezone,
+        "active": active
+    }
+
+
+def in_quiet_hours(subscriber, now=None, default_timezone="UTC"):
+    """Klidové hodiny se vyhodnocují v pásmu odběratele (timezone), jinak v default_timezone"""
+    quiet_hours = subscriber.get("quiet_hours")
+    if not quiet_hours:
+        return False
+    local = datetime.fromtimestamp(now or time.time(), get_timezone(subscriber.get("timezone") or default_timezone))
+    minute = local.hour * 60 + local.minute
+    start, end = parse_hhmm(quiet_hours["start"]), parse_hhmm(quiet_hours["end"])
+    if start <= end:
+        return start <= minute < end
+    return minute >= start or minute < end  # přes půlnoc
+
+
+class SubscriberRegistry:
+    """
+    Odběratelé výsledků (kanály, lokality, klidové hodiny), uložení v JSON souboru.
+    timezone je výchozí pásmo klidových hodin pro odběratele bez vlastního.
+    """
+
+    def __init__(self, path, defaults=None, timezone="UTC"):
+        self.path = path
+        self.timezone = get_timezone(timezone).key
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._backup_pending = False
+        self._load(defaults or [])
+
+    def _load(self, defaults):
+        """
+        Výchozí odběratelé (z prostředí) se použijí jen bez uloženého souboru.
+        Neplatné záznamy se přeskočí a před prvním přepsáním se soubor zálohuje.
+        """
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                if not isinstance(stored, list):
+                    raise ValueError("soubor musí obsahovat seznam odběratelů")
+            except Exception as e:
+                print(f"Chyba při načítání odběratelů z {self.path}: {e}")
+                self._backup_pending = True
+                return
+            for data in stored:
+                try:
+                    subscriber = validate_subscriber(data)
+                except ValueError as e:
+                    print(f"Přeskakuji neplatného odběratele v {self.path}: {e}")
+                    self._backup_pending = True
+                    continue
+                self._subscribers[subscriber["id"]] = subscriber
+            return
+        for data in defaults:
+            subscriber = validate_subscriber(data)
+            self._subscribers[subscriber["id"]] = subscriber
+
+    def _persist(self):
+        if not self.path:
+            return
+        if self._backup_pending:
+            # Soubor se nenačetl celý - původní obsah se před přepsáním zachová
+            backup_path = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}.bak"
+            shutil.copy2(self.path, backup_path)
+            print(f"Původní soubor odběratelů zálohován do {backup_path}.")
+            self._backup_pending = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(self._subscribers.values()), f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def all(self):
+        with self._lock:
+            return [dict(s) for s in self._subscribers.values()]
+
+    def upsert(self, data):
+        subscriber = validate_subscriber(data)
+        with self._lock:
+            self._subscribers[subscriber["id"]] = subscriber
+            self._persist()
+        return dict(subscriber)
+
+    def remove(self, subscriber_id):
+        with self._lock:
+            if self._subscribers.pop(subscriber_id, None) is None:
+                return False
+            self._persist()
+            return True
+
+    def matching(self, location):
+        """Aktivní odběratelé dané lokality (prázdné locations = všechny)"""
+        location = location.lower()
+        with self._lock:
+            return [
+                dict(s) for s in self._subscribers.values()
+                if s["active"] and (not s["locations"] or location in (loc.lower() for loc in s["locations"]))
+            ]
+
+
+class ChannelStats:
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.suppressed = 0
+        self.busy_time = 0.0
+        self.last_error = None
+
+    def to_dict(self):
+        delivered = self.sent + self.failed
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "suppressed_quiet_hours": self.suppressed,
+            "avg_latency": round(self.busy_time / delivered, 3) if delivered else None,
+            "last_error": self.last_error
+        }
+
+
+class Notifier:
+    """
+    Rozeslání jedné (jednou vytvořené) analýzy všem odpovídajícím odběratelům.
+
+    Doručení běží souběžně přes senders[kanál](odběratel, předmět, text),
+    který vrací None při úspěchu nebo text chyby. Statistiky se vedou po kanálech.
+    """
+
+    def __init__(self, registry, senders, concurrency=8):
+        self.registry = registry
+        self.senders = senders
+        self._pool = ThreadPoolExecutor(max_workers=concurrency)
+        self._lock = threading.Lock()
+        self._stats = {channel: ChannelStats() for channel in senders}
+        self._last_fan_out = None
+
+    def _deliver(self, channel, subscriber, subject, body):
+        started = time.monotonic()
+        try:
+            error = self.senders[channel](subscriber, subject, body)
+        except Exception as e:
+            error = str(e)
+        elapsed = time.monotonic() - started
+        with self._lock:
+            stats = self._stats[channel]
+            stats.busy_time += elapsed
+            if error:
+                stats.failed += 1
+                stats.last_error = error
+            else:
+                stats.sent += 1
+        return error
+
+    def fan_out(self, location, subject, body):
+        """Doručí zprávu všem odběratelům lokality, vrací souhrn"""
+        started = time.monotonic()
+        futures = []
+        suppressed = 0
+        for subscriber in self.registry.matching(location):
+            quiet = in_quiet_hours(subscriber, default_timezone=self.registry.timezone)
+            for channel in subscriber["channels"]:
+                if channel not in self.senders:
+                    continue
+                if quiet:
+                    suppressed += 1
+                    with self._lock:
+                        self._stats[channel].suppressed += 1
+                    continue
+                futures.append(self._pool.submit(self._deliver, channel, subscriber, subject, body))
+
+        errors = [f.result() for f in futures]
+        elapsed = time.monotonic() - started
+        summary = {
+            "location": location,
+            "deliveries": len(futures),
+            "failed": sum(1 for error in errors if error),
+            "suppressed_quiet_hours": suppressed,
+            "duration": round(elapsed, 3),
+            "per_second": round(len(futures) / elapsed, 2) if futures and elapsed > 0 else None,
+            "at": time.time()
+        }
+        with self._lock:
+            self._last_fan_out = summary
+        return summary
+
+    def status(self):
+        with self._lock:
+            return {
+                "channels": {channel: stats.to_dict() for channel, stats in self._stats.items()},
+                "last_fan_out": self._last_fan_out
+            }
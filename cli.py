@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
+import os
 import sys
+import time
 import requests
 import json
 import argparse
@@ -16,6 +18,21 @@ def get_status():
             print("Konfigurace:")
             for key, value in data['config'].items():
                 print(f"  {key}: {value}")
+            agent_config = data.get("agent_config")
+            if agent_config:
+                print(f"Verze agent_config: {agent_config['version']} (model {agent_config['model']})")
+                if agent_config.get("last_error"):
+                    print(f"  Chyba poslední změny: {agent_config['last_error']}")
+            scheduler = data.get("scheduler")
+            if scheduler:
+                current = scheduler.get("current_cycle")
+                if current:
+                    print(f"Běžící cyklus: #{current['id']} ({current['reason']})")
+                if scheduler.get("next_run_in") is not None:
+                    print(f"Další cyklus za: {scheduler['next_run_in']} s")
+            schedule = data.get("schedule")
+            if schedule:
+                print(f"Plánování: {schedule['mode']}, interval {schedule['interval']} s ({schedule['reason']})")
         else:
             print(f"Chyba: {response.status_code} - {response.text}")
     except requests.exceptions.ConnectionError:
@@ -38,11 +55,19 @@ def stop_agent():
 def run_now():
     try:
         response = requests.post(f"{AGENT_URL}/run-now")
+        data = response.json()
+        print(data.get("message") or data.get("error", "Chyba"))
+    except Exception as e:
+        print(f"Chyba: {e}")
+
+def cancel_cycle():
+    try:
+        response = requests.post(f"{AGENT_URL}/cancel")
         print(response.json().get("message", "Chyba"))
     except Exception as e:
         print(f"Chyba: {e}")
 
-def update_config(location=None, min_area=None, interval=None):
+def update_config(location=None, min_area=None, interval=None, adaptive=None):
     data = {}
     if location:
         data["location"] = location
@@ -50,6 +75,8 @@ def update_config(location=None, min_area=None, interval=None):
         data["min_area"] = min_area
     if interval:
         data["interval"] = interval
+    if adaptive:
+        data["adaptive"] = adaptive == "on"
         
     if not data:
         print("Nebyly zadány žádné parametry ke změně.")
@@ -67,9 +94,39 @@ def update_config(location=None, min_area=None, interval=None):
     except Exception as e:
         print(f"Chyba: {e}")
 
-def send_prompt(message):
+def list_results(limit=10, offset=0, location=None, result_id=None):
     try:
-        response = requests.post(f"{AGENT_URL}/prompt", json={"message": message})
+        if result_id:
+            response = requests.get(f"{AGENT_URL}/results/{result_id}")
+            if response.status_code != 200:
+                print(f"Chyba: {response.json().get('error', 'Neznámá chyba')}")
+                return
+            items = [response.json()]
+        else:
+            params = {"limit": limit, "offset": offset}
+            if location:
+                params["location"] = location
+            response = requests.get(f"{AGENT_URL}/results", params=params)
+            data = response.json()
+            if response.status_code != 200:
+                print(f"Chyba: {data.get('error', 'Neznámá chyba')}")
+                return
+            items = data["results"]
+            print(f"Výsledky {offset + 1}-{offset + len(items)} z {data['total']}")
+
+        for item in items:
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(item["created_at"]))
+            print("")
+            print(f"#{item['id']} {created} {item['location']} (min {item['min_area']} m2) - {item['status']}")
+            print(f"  Nabídek: {item['listing_count']}, model: {item['model']}, časy: {item['timings']}")
+            if item.get("analysis"):
+                print(item["analysis"] if result_id else item["analysis"][:300])
+    except Exception as e:
+        print(f"Chyba: {e}")
+
+def send_prompt(message, fresh=False):
+    try:
+        response = requests.post(f"{AGENT_URL}/prompt", json={"message": message, "fresh": fresh})
         if response.status_code == 200:
             data = response.json()
             print(f"Agent: {data.get('message')}")
@@ -82,6 +139,26 @@ def send_prompt(message):
     except Exception as e:
         print(f"Chyba: {e}")
 
+def profile(seconds, output_format, url=None):
+    """Vzorkování CPU agenta nebo služby (vyžaduje DEBUG_TOKEN v prostředí)"""
+    token = os.getenv("DEBUG_TOKEN")
+    if not token:
+        print("Nastavte DEBUG_TOKEN (stejný jako u agenta/služby).")
+        return
+    try:
+        response = requests.get(
+            f"{url or AGENT_URL}/debug/profile",
+            params={"seconds": seconds, "format": output_format},
+            headers={"X-Debug-Token": token},
+            timeout=seconds + 30
+        )
+        if response.status_code == 200:
+            sys.stdout.write(response.text)
+        else:
+            print(f"Chyba: {response.status_code} - {response.text}")
+    except Exception as e:
+        print(f"Chyba: {e}")
+
 def main():
     parser = argparse.ArgumentParser(description="CLI pro ovládání Real Estate Agenta")
     subparsers = parser.add_subparsers(dest="command", help="Příkaz")
@@ -98,15 +175,33 @@ def main():
     # Příkaz run-now
     subparsers.add_parser("run-now", help="Okamžitě spustit vyhledávání")
 
+    # Příkaz cancel
+    subparsers.add_parser("cancel", help="Zrušit právě běžící vyhledávání")
+
     # Příkaz prompt (chat)
     prompt_parser = subparsers.add_parser("prompt", help="Poslat agentovi instrukci v přirozeném jazyce")
     prompt_parser.add_argument("message", help="Zpráva pro agenta (v uvozovkách)")
+    prompt_parser.add_argument("--fresh", action="store_true", help="Vždy nové vyhledání (nepoužít uložený výsledek)")
+
+    # Příkaz results
+    results_parser = subparsers.add_parser("results", help="Zobrazit historii výsledků vyhledávání")
+    results_parser.add_argument("id", nargs="?", type=int, help="ID výsledku (detail)")
+    results_parser.add_argument("--limit", type=int, default=10, help="Počet výsledků")
+    results_parser.add_argument("--offset", type=int, default=0, help="Posun (stránkování)")
+    results_parser.add_argument("--location", help="Filtr podle lokality")
 
     # Příkaz config
     config_parser = subparsers.add_parser("config", help="Změnit konfiguraci")
     config_parser.add_argument("--location", help="Lokalita (např. Praha)")
     config_parser.add_argument("--min-area", type=int, help="Minimální plocha v m2")
     config_parser.add_argument("--interval", type=int, help="Interval v sekundách")
+    config_parser.add_argument("--adaptive", choices=["on", "off"], help="Adaptivní interval podle přírůstku nabídek")
+
+    # Příkaz profile
+    profile_parser = subparsers.add_parser("profile", help="Vzorkování CPU (collapsed stacks pro flamegraph)")
+    profile_parser.add_argument("--seconds", type=float, default=10, help="Délka vzorkování")
+    profile_parser.add_argument("--format", choices=["collapsed", "top"], default="collapsed", help="Formát výstupu")
+    profile_parser.add_argument("--url", help="URL služby (výchozí agent), např. http://localhost:5001")
 
     args = parser.parse_args()
 
@@ -118,10 +213,16 @@ def main():
         stop_agent()
     elif args.command == "run-now":
         run_now()
+    elif args.command == "cancel":
+        cancel_cycle()
     elif args.command == "prompt":
-        send_prompt(args.message)
+        send_prompt(args.message, args.fresh)
+    elif args.command == "results":
+        list_results(args.limit, args.offset, args.location, args.id)
     elif args.command == "config":
-        update_config(args.location, args.min_area, args.interval)
+        update_config(args.location, args.min_area, args.interval, args.adaptive)
+    elif args.command == "profile":
+        profile(args.seconds, args.format, args.url)
     else:
         parser.print_help()
 
@@ -1,34 +1,73 @@
 from flask import Flask, request, jsonify
-from openai import OpenAI
 import os
+import sys
+import threading
+# Sdílený profiling.py leží ve services/common (v obrazu se kopíruje vedle app.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import profiling
 
 app = Flask(__name__)
+# Profilování za běhu (/debug/profile, hlavička X-Profile), jen s DEBUG_TOKEN
+profiling.install(app, "ai-analyzer")
 
-# Inicializace GitHub Models klienta
 COPILOT_GITHUB_TOKEN = os.getenv("COPILOT_GITHUB_TOKEN")
-client = OpenAI(
-    base_url="https://models.inference.ai.azure.com",
-    api_key=COPILOT_GITHUB_TOKEN
-)
+
+# GitHub Models klient - SDK openai se načte až na pozadí po startu (nebo při prvním požadavku),
+# aby import nezdržoval start kontejneru
+_client = None
+_client_lock = threading.Lock()
+_ready = threading.Event()
+_warm_error = None
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(
+                    base_url="https://models.inference.ai.azure.com",
+                    api_key=COPILOT_GITHUB_TOKEN
+                )
+                _ready.set()
+    return _client
+
+def warm_up():
+    global _warm_error
+    if not COPILOT_GITHUB_TOKEN:
+        _warm_error = "missing COPILOT_GITHUB_TOKEN"
+        return
+    try:
+        get_client()
+    except Exception as e:
+        _warm_error = str(e)
+        print(f"Warm-up failed: {e}")
+
+threading.Thread(target=warm_up, daemon=True).start()
 
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({"status": "healthy", "service": "ai-analyzer"}), 200
 
-@app.route('/analyze', methods=['POST'])
-def analyze():
+@app.route('/ready', methods=['GET'])
+def ready():
     """
-    Očekávaný JSON:
-    {
-        "prompt": "Analyzuj následující nabídky...",
-        "context": "dodatečný kontext",
-        "model": "gpt-4o",  # volitelné, default gpt-4o
-        "temperature": 0.2,  # volitelné
-        "max_tokens": 1000   # volitelné
-    }
+    Připravenost - SDK načteno a klient vytvořen. Chybějící token je
+    trvalý stav, ne "ještě nezahřáto" - hlásí se jako configured: false.
+    """
+    if not COPILOT_GITHUB_TOKEN:
+        return jsonify({"ready": True, "configured": False, "service": "ai-analyzer",
+                        "error": "missing COPILOT_GITHUB_TOKEN"}), 200
+    if not _ready.is_set():
+        return jsonify({"ready": False, "service": "ai-analyzer", "error": _warm_error}), 503
+    return jsonify({"ready": True, "configured": True, "service": "ai-analyzer"}), 200
+
+def analyze_request(data, timeout=None):
+    """
+    Jádro /analyze - sdílené s agentem v embedded režimu, vrací (odpověď, HTTP status).
+    timeout (s) omezí volání modelu - agent v embedded režimu předává svůj timeout volání služby.
     """
     try:
-        data = request.get_json()
         prompt = data.get('prompt')
         context = data.get('context', '')
         model = data.get('model', 'gpt-4o')
@@ -36,11 +75,15 @@ def analyze():
         max_tokens = data.get('max_tokens', 1000)
         
         if not prompt:
-            return jsonify({"error": "No prompt provided"}), 400
+            return {"error": "No prompt provided"}, 400
+        
+        if not COPILOT_GITHUB_TOKEN:
+            return {"error": "AI analyzer not configured (missing COPILOT_GITHUB_TOKEN)"}, 500
         
         # Sestavení zprávy
         full_prompt = f"{prompt}\n\n{context}" if context else prompt
         
+        client = get_client() if timeout is None else get_client().with_options(timeout=timeout)
         response = client.chat.completions.create(
             model=model,
             messages=[
@@ -53,15 +96,30 @@ def analyze():
         
         analysis = response.choices[0].message.content
         
-        return jsonify({
+        return {
             "success": True,
             "analysis": analysis,
             "model": model,
             "tokens_used": response.usage.total_tokens if hasattr(response, 'usage') else None
-        }), 200
+        }, 200
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    """
+    Očekávaný JSON:
+    {
+        "prompt": "Analyzuj následující nabídky...",
+        "context": "dodatečný kontext",
+        "model": "gpt-4o",  # volitelné, default gpt-4o
+        "temperature": 0.2,  # volitelné
+        "max_tokens": 1000   # volitelné
+    }
+    """
+    body, status = analyze_request(request.get_json(silent=True) or {})
+    return jsonify(body), status
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5002, debug=False)
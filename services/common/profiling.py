@@ -0,0 +1,264 @@
+import os
+import io
+import sys
+import hmac
+import time
+import uuid
+import pstats
+import cProfile
+import threading
+from collections import Counter, OrderedDict
+from flask import Response, g, has_request_context, jsonify, request
+
+# Ladicí endpointy jsou dostupné jen s nastaveným DEBUG_TOKEN (hlavička X-Debug-Token)
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN")
+MAX_SECONDS = 120
+
+
+def authorized():
+    token = request.headers.get("X-Debug-Token", "")
+    return bool(DEBUG_TOKEN) and hmac.compare_digest(token, DEBUG_TOKEN)
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Vzorkovací profiler všech vláken - každých interval sekund zaznamená zásobníky
+    (sys._current_frames). Nezpomaluje profilovaný kód jako cProfile a vidí i vlákna
+    plánovače a crawleru, ne jen vlákno požadavku. Běží nejvýše jedno vzorkování.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def sample(self, seconds, interval=0.005):
+        """Vrací (Counter zásobník -> počet vzorků, počet průchodů) nebo None, pokud už vzorkování běží"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            own = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = Counter()
+            rounds = 0
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(names.get(ident, f"thread-{ident}"))
+                    stacks[";".join(reversed(labels))] += 1
+                rounds += 1
+                time.sleep(interval)
+            return stacks, rounds
+        finally:
+            self._lock.release()
+
+
+def collapsed(stacks):
+    """Formát pro flamegraph.pl / speedscope: "vlákno;f1;f2 počet" na řádek"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def top_functions(stacks, limit=40):
+    """Funkce podle vzorků - vlastní (na vrcholu zásobníku) a celkové (kdekoli v zásobníku)"""
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")[1:]
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for label in set(frames):
+            total[label] += count
+    samples = sum(stacks.values()) or 1
+    lines = [f"{'vlastní':>8} {'celkem':>8}  funkce"]
+    for label, count in own.most_common(limit):
+        lines.append(f"{100 * count / samples:7.1f}% {100 * total[label] / samples:7.1f}%  {label}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestProfile:
+    """
+    cProfile jednoho požadavku - vlákno požadavku a případně pracovní vlákna
+    (funkce obalené přes wrap), výsledky se při dokončení sloučí do jedněch pstats.
+    """
+
+    def __init__(self, sort):
+        self.id = uuid.uuid4().hex[:8]
+        self.sort = sort
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._profilers = []
+        self._main = None
+
+    def start(self):
+        profiler = cProfile.Profile()
+        profiler.enable()  # ValueError, pokud už běží jiný profiler
+        self._main = profiler
+
+    def stop(self):
+        if self._main is not None:
+            self._main.disable()
+            with self._lock:
+                self._profilers.append(self._main)
+            self._main = None
+
+    def wrap(self, fn):
+        def profiled(*args, **kwargs):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.disable()
+                with self._lock:
+                    self._profilers.append(profiler)
+        return profiled
+
+    def stats_text(self, limit=40):
+        with self._lock:
+            profilers = list(self._profilers)
+        if not profilers:
+            return ""
+        output = io.StringIO()
+        stats = pstats.Stats(profilers[0], stream=output)
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        stats.sort_stats(self.sort).print_stats(limit)
+        return output.getvalue()
+
+
+def wrap_threads(fn):
+    """Obalí funkci spouštěnou v jiných vláknech, aby se započítala do profilu aktuálního požadavku"""
+    profile = g.get("profile") if has_request_context() else None
+    return profile.wrap(fn) if profile else fn
+
+
+class RequestProfiles:
+    """Posledních max_size profilů jednotlivých požadavků (pstats text)"""
+
+    def __init__(self, max_size=20):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._profiles = OrderedDict()
+
+    def add(self, entry):
+        with self._lock:
+            self._profiles[entry["id"]] = entry
+            while len(self._profiles) > self.max_size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self):
+        with self._lock:
+            return [
+                {key: value for key, value in entry.items() if key != "stats"}
+                for entry in reversed(self._profiles.values())
+            ]
+
+
+sampler = StackSampler()
+request_profiles = RequestProfiles()
+
+
+def install(app, service):
+    """
+    Přidá do Flask aplikace profilování za běhu (bez redeploye):
+    - GET /debug/profile?seconds=10&format=collapsed|top - vzorkování CPU všech vláken
+    - hlavička X-Profile: cumulative|tottime|calls - cProfile jednoho požadavku (u streamu
+      až do odeslání posledního bajtu), výsledek na GET /debug/profile/requests/<id>
+      (id v hlavičce odpovědi X-Profile-Id)
+    """
+
+    @app.before_request
+    def start_request_profile():
+        if request.headers.get("X-Profile") and not request.path.startswith("/debug/") and authorized():
+            sort = request.headers.get("X-Profile")
+            profile = RequestProfile(sort if sort in ("cumulative", "tottime", "calls") else "cumulative")
+            try:
+                profile.start()
+            except ValueError:  # jiný profiler už běží
+                return
+            g.profile = profile
+
+    @app.after_request
+    def finish_request_profile(response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        entry = {
+            "id": profile.id,
+            "service": service,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code
+        }
+
+        def finish():
+            profile.stop()
+            entry["duration"] = round(time.monotonic() - profile.started, 3)
+            entry["at"] = time.time()
+            entry["stats"] = profile.stats_text()
+            request_profiles.add(entry)
+
+        # Profil se uzavře až po odeslání odpovědi (streamované odpovědi běží až po view)
+        response.call_on_close(finish)
+        response.headers["X-Profile-Id"] = profile.id
+        return response
+
+    @app.teardown_request
+    def abort_request_profile(error=None):
+        # Neošetřená výjimka - after_request se nevolal
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.stop()
+
+    @app.route('/debug/profile', methods=['GET'])
+    def debug_profile():
+        """Vzorkování CPU na N sekund (collapsed stacks pro flamegraph, nebo top funkcí)"""
+        if not authorized():
+            return jsonify({"error": "Not found"}), 404
+        try:
+            seconds = min(float(request.args.get("seconds", 10)), MAX_SECONDS)
+            interval = max(float(request.args.get("interval", 0.005)), 0.001)
+        except ValueError:
+            return jsonify({"error": "seconds a interval musí být čísla"}), 400
+        output_format = request.args.get("format", "collapsed")
+        if output_format not in ("collapsed", "top"):
+            return jsonify({"error": "format musí být collapsed nebo top"}), 400
+
+        result = sampler.sample(seconds, interval)
+        if result is None:
+            return jsonify({"error": "Vzorkování už běží"}), 409
+        stacks, rounds = result
+        body = collapsed(stacks) if output_format == "collapsed" else top_functions(stacks)
+        return Response(body, mimetype="text/plain", headers={"X-Profile-Samples": str(rounds)})
+
+    @app.route('/debug/profile/requests', methods=['GET'])
+    def debug_request_profiles():
+        if not authorized():
+            return jsonify({"error": "Not found"}), 404
+        return jsonify({"profiles": request_profiles.list()}), 200
+
+    @app.route('/debug/profile/requests/<profile_id>', methods=['GET'])
+    def debug_request_profile(profile_id):
+        if not authorized():
+            return jsonify({"error": "Not found"}), 404
+        entry = request_profiles.get(profile_id)
+        if entry is None:
+            return jsonify({"error": "Profil nenalezen"}), 404
+        return Response(entry["stats"], mimetype="text/plain")
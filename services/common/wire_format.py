@@ -0,0 +1,130 @@
+import sys
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # volitelná závislost - bez ní scraper nabízí a agent přijímá jen JSON/NDJSON
+    msgpack = None
+
+# Formát streamu nabídek scraper -> agent; sdílí ho scraper (kódování) i agent (dekódování)
+MSGPACK_TYPE = "application/x-msgpack"
+NDJSON_TYPE = "application/x-ndjson"
+
+# Značky záznamů v msgpack streamu (kromě "s" = zdroj a "l" = nabídka)
+MSGPACK_KINDS = {"e": "error", "d": "done"}
+
+
+class Listing:
+    """
+    Kompaktní nabídka - __slots__ místo slovníku, URL zdroje je internovaný řetězec
+    sdílený všemi nabídkami ze stejného zdroje. Pro čtení se chová jako slovník.
+    """
+
+    __slots__ = ("text", "url", "source")
+
+    def __init__(self, text, url, source):
+        self.text = text
+        self.url = url
+        self.source = sys.intern(source or "")
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("text", ""), data.get("url"), data.get("source"))
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def to_dict(self):
+        return {"text": self.text, "url": self.url, "source": self.source}
+
+
+def to_dict(record):
+    return record.to_dict() if isinstance(record, Listing) else record
+
+
+class GzipStream:
+    """Průběžná gzip komprese streamu - data se vyprázdní (flush) na konci každé stránky"""
+
+    def __init__(self, level=6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip hlavička
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def gzip_bytes(data, level=6):
+    compressor = GzipStream(level)
+    return compressor.compress(data) + compressor.finish()
+
+
+class NdjsonEncoder:
+    """Jeden JSON objekt na řádek: {"type": "listing"|"error"|"done", ...}"""
+
+    content_type = NDJSON_TYPE
+
+    def encode(self, kind, record):
+        return (json.dumps(dict(to_dict(record), type=kind), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class MsgpackEncoder:
+    """
+    Kompaktní msgpack stream - pole místo objektů, zdroj se pošle jednou a dál jen jeho ID:
+    ["s", id, url], ["l", text, url, id], ["e", chyba], ["d", souhrn]
+    """
+
+    content_type = MSGPACK_TYPE
+
+    def __init__(self):
+        self._packer = msgpack.Packer()
+        self._sources = {}
+
+    def encode(self, kind, record):
+        if kind != "listing":
+            return self._packer.pack([kind[0], to_dict(record)])  # "e" / "d" podle MSGPACK_KINDS
+        data = b""
+        source_id = self._sources.get(record.source)
+        if source_id is None:
+            source_id = self._sources[record.source] = len(self._sources)
+            data = self._packer.pack(["s", source_id, record.source])
+        return data + self._packer.pack(["l", record.text, record.url, source_id])
+
+
+def stream_encoder(accept):
+    """Formát streamu podle hlavičky Accept (msgpack jen pokud je knihovna k dispozici)"""
+    if msgpack is not None and MSGPACK_TYPE in accept:
+        return MsgpackEncoder()
+    return NdjsonEncoder()
+
+
+def iter_msgpack_records(chunks):
+    """
+    Dekóduje msgpack stream scraperu na (typ, záznam):
+    ["s", id, url] zaregistruje zdroj, ["l", text, url, id] je nabídka, ["e"|"d", záznam] chyba/souhrn
+    """
+    unpacker = msgpack.Unpacker(raw=False)
+    sources = {}
+    for chunk in chunks:
+        unpacker.feed(chunk)
+        for item in unpacker:
+            tag = item[0]
+            if tag == "s":
+                sources[item[1]] = sys.intern(item[2])
+            elif tag == "l":
+                yield "listing", Listing(item[1], item[2], sources[item[3]])
+            elif tag in MSGPACK_KINDS:
+                yield MSGPACK_KINDS[tag], item[1]
@@ -3,8 +3,14 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
+import sys
+# Sdílený profiling.py leží ve services/common (v obrazu se kopíruje vedle app.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import profiling
 
 app = Flask(__name__)
+# Profilování za běhu (/debug/profile, hlavička X-Profile), jen s DEBUG_TOKEN
+profiling.install(app, "email")
 
 # Konfigurace z prostředí
 SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
@@ -16,29 +22,32 @@ EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 def health():
     return jsonify({"status": "healthy", "service": "email"}), 200
 
-@app.route('/send', methods=['POST'])
-def send_email():
+@app.route('/ready', methods=['GET'])
+def ready():
     """
-    Očekávaný JSON:
-    {
-        "to": "recipient@example.com",
-        "subject": "Předmět zprávy",
-        "body": "Text zprávy",
-        "html": false  # volitelné, pokud true, body bude HTML
-    }
+    Připravenost (smtplib je součást stdlib, není co zahřívat). Chybějící přihlašovací
+    údaje jsou trvalý stav, ne "ještě nezahřáto" - hlásí se jako configured: false.
+    """
+    if not EMAIL_SENDER or not EMAIL_PASSWORD:
+        return jsonify({"ready": True, "configured": False, "service": "email", "error": "missing credentials"}), 200
+    return jsonify({"ready": True, "configured": True, "service": "email"}), 200
+
+def send_request(data, timeout=None):
+    """
+    Jádro /send - sdílené s agentem v embedded režimu, vrací (odpověď, HTTP status).
+    timeout (s) platí pro spojení se SMTP serverem.
     """
     try:
-        data = request.get_json()
         recipient = data.get('to')
         subject = data.get('subject')
         body = data.get('body')
         is_html = data.get('html', False)
         
         if not all([recipient, subject, body]):
-            return jsonify({"error": "Missing required fields: to, subject, body"}), 400
+            return {"error": "Missing required fields: to, subject, body"}, 400
         
         if not EMAIL_SENDER or not EMAIL_PASSWORD:
-            return jsonify({"error": "Email service not configured (missing credentials)"}), 500
+            return {"error": "Email service not configured (missing credentials)"}, 500
         
         msg = MIMEMultipart()
         msg["From"] = EMAIL_SENDER
@@ -48,20 +57,34 @@ def send_email():
         mime_type = "html" if is_html else "plain"
         msg.attach(MIMEText(body, mime_type))
         
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
+        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=timeout)
         server.starttls()
         server.login(EMAIL_SENDER, EMAIL_PASSWORD)
         server.sendmail(EMAIL_SENDER, recipient, msg.as_string())
         server.quit()
         
-        return jsonify({
+        return {
             "success": True,
             "message": "Email sent successfully",
             "to": recipient
-        }), 200
+        }, 200
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
+
+@app.route('/send', methods=['POST'])
+def send_email():
+    """
+    Očekávaný JSON:
+    {
+        "to": "recipient@example.com",
+        "subject": "Předmět zprávy",
+        "body": "Text zprávy",
+        "html": false  # volitelné, pokud true, body bude HTML
+    }
+    """
+    body, status = send_request(request.get_json(silent=True) or {})
+    return jsonify(body), status
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5003, debug=False)
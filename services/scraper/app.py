@@ -1,70 +1,226 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+import os
+import sys
+import json
+import threading
 import requests
-from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+from source_health import SourceHealthRegistry
+from frontier import Crawler, HostPoliteness, RobotsCache, PageHistory, USER_AGENT
+# Sdílené moduly (profiling.py, wire_format.py) leží ve services/common (v obrazu se kopírují vedle app.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from wire_format import Listing, GzipStream, gzip_bytes, stream_encoder, NDJSON_TYPE, MSGPACK_TYPE
+import profiling
 
 app = Flask(__name__)
+# Profilování za běhu (/debug/profile, hlavička X-Profile), jen s DEBUG_TOKEN
+profiling.install(app, "scraper")
+
+# Zdraví zdrojů a jističe (stav je v paměti každého workeru)
+source_health = SourceHealthRegistry(
+    failure_threshold=int(os.getenv("BREAKER_THRESHOLD", 3)),
+    cooldown=int(os.getenv("BREAKER_COOLDOWN", 300))
+)
+
+# Crawler se stránkováním - rozestup požadavků na host, robots.txt, priorita nenavštívených stránek
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", 3))
+crawler = Crawler(
+    politeness=HostPoliteness(delay=float(os.getenv("HOST_DELAY", 1.0))),
+    robots=RobotsCache(ttl=int(os.getenv("ROBOTS_TTL", 3600))),
+    history=PageHistory(),
+    source_health=source_health,
+    workers=int(os.getenv("CRAWL_WORKERS", 4))
+)
+
+# gzip komprese odpovědí pro klienty s Accept-Encoding: gzip
+COMPRESS_RESPONSES = os.getenv("COMPRESS_RESPONSES", "true").lower() in ("1", "true", "yes")
+
+# Texty/třídy odkazů na další stránku výpisu
+NEXT_PAGE_TEXTS = {"další", "další strana", "další stránka", "následující", "next", "›", "»", ">"}
+
+# BeautifulSoup se načte na pozadí po startu (nebo při prvním parsování)
+_ready = threading.Event()
+
+def warm_up():
+    from bs4 import BeautifulSoup
+    BeautifulSoup("<a href='/'>warm</a>", "html.parser").find_all("a")
+    _ready.set()
+
+threading.Thread(target=warm_up, daemon=True).start()
 
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({"status": "healthy", "service": "scraper"}), 200
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Připravenost - parser načten"""
+    if not _ready.is_set():
+        return jsonify({"ready": False, "service": "scraper"}), 503
+    return jsonify({"ready": True, "service": "scraper"}), 200
+
+@app.route('/sources', methods=['GET'])
+def sources():
+    """Zdraví jednotlivých zdrojů (úspěšnost, latence, stav jističe)"""
+    return jsonify({"sources": source_health.status()}), 200
+
+def extract_listings(soup, keywords, source):
+    """Extraktor odkazů s textem (filtrování podle klíčových slov, pokud jsou zadána)"""
+    listings = []
+    for a in soup.find_all("a", href=True):
+        text = a.get_text(strip=True)
+        if not text:
+            continue
+        if keywords and not any(keyword.lower() in text.lower() for keyword in keywords):
+            continue
+        listings.append(Listing(text, a["href"], source))
+    return listings
+
+def find_next_pages(soup, page_url):
+    """Odkazy na další stránku výpisu (rel=next, text "další", třída *next*)"""
+    next_urls = []
+    for tag in soup.find_all(["a", "link"], href=True):
+        rel = [value.lower() for value in tag.get("rel", [])]
+        classes = " ".join(tag.get("class", [])).lower()
+        text = tag.get_text(strip=True).lower() if tag.name == "a" else ""
+        if "next" in rel or text in NEXT_PAGE_TEXTS or "next" in classes:
+            url = urljoin(page_url, tag["href"])
+            if url != page_url and url not in next_urls:
+                next_urls.append(url)
+    return next_urls
+
+def make_page_fetcher(keywords):
+    def fetch_page(url, source):
+        response = requests.get(url, timeout=10, headers={"User-Agent": USER_AGENT})
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(response.text, "html.parser")
+        return extract_listings(soup, keywords, source), find_next_pages(soup, url)
+    return fetch_page
+
+def iter_scrape(urls, keywords, max_pages, fetch_page=None):
+    """
+    Průběžný výsledek scrapování: ("listing", nabídka), ("error", chyba),
+    ("page", stránka) po dokončení každé stránky a nakonec ("done", souhrn).
+    Nabídky se vrací hned po dokončení stránky.
+    """
+    seen = set()
+    pages = 0
+    count = 0
+    errors = 0
+    fetched = 0  # skutečně odeslané požadavky (bez zdrojů přeskočených jističem / robots.txt)
+    
+    fetch_page = fetch_page or make_page_fetcher(keywords)
+    for result in crawler.crawl(urls, fetch_page, max_pages=max_pages):
+        if "error" in result:
+            error = {"error": result["error"], "source": result["source"]}
+            if result["page"] != result["source"]:
+                error["page"] = result["page"]
+            if result.get("skipped"):
+                error["skipped"] = True
+            else:
+                fetched += 1
+            errors += 1
+            yield "error", error
+            continue
+        
+        pages += 1
+        fetched += 1
+        for listing in result["listings"]:
+            # Stejné odkazy (navigace) se opakují na každé stránce výpisu
+            key = (listing.source, listing.url)
+            if key not in seen:
+                seen.add(key)
+                count += 1
+                yield "listing", listing
+        yield "page", {"page": result["page"], "source": result["source"]}
+    
+    yield "done", {"count": count, "pages": pages, "errors": errors, "fetched": fetched}
+
+def wants_stream(data):
+    accept = request.headers.get("Accept", "")
+    return bool(data.get("stream")) or NDJSON_TYPE in accept or MSGPACK_TYPE in accept
+
+def wants_gzip():
+    return COMPRESS_RESPONSES and "gzip" in request.headers.get("Accept-Encoding", "")
+
 @app.route('/scrape', methods=['POST'])
 def scrape():
     """
     Očekávaný JSON:
     {
         "urls": ["https://example.com", ...],
-        "keywords": ["byt", "pronájem"]  # volitelné
+        "keywords": ["byt", "pronájem"],  # volitelné
+        "max_pages": 3,  # volitelné, počet stránek výpisu na každou URL (nejvýše CRAWL_MAX_PAGES)
+        "stream": false  # volitelné, true = NDJSON (také Accept: application/x-ndjson)
     }
+    Stream ve formátu msgpack (Accept: application/x-msgpack), pokud je knihovna nainstalovaná.
+    S Accept-Encoding: gzip se odpověď komprimuje.
     """
     try:
         data = request.get_json()
         urls = data.get('urls', [])
         keywords = data.get('keywords', [])
+        max_pages = data.get('max_pages', CRAWL_MAX_PAGES)
         
         if not urls:
             return jsonify({"error": "No URLs provided"}), 400
+        if isinstance(max_pages, bool) or not isinstance(max_pages, int) or max_pages < 1:
+            return jsonify({"error": "max_pages must be a positive integer"}), 400
+        # Hloubku procházení omezuje konfigurace scraperu, ne klient
+        max_pages = min(max_pages, CRAWL_MAX_PAGES)
         
-        all_listings = []
+        # Stahování a parsování běží ve vláknech crawleru, do profilu požadavku se započítá přes wrap_threads
+        results = iter_scrape(urls, keywords, max_pages, profiling.wrap_threads(make_page_fetcher(keywords)))
         
-        for url in urls:
-            try:
-                response = requests.get(url, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    
-                    # Extraktor odkazů s textem
-                    for a in soup.find_all("a", href=True):
-                        text = a.get_text(strip=True)
-                        href = a["href"]
-                        
-                        # Filtrování podle klíčových slov (pokud jsou zadána)
-                        if keywords:
-                            if text and any(keyword.lower() in text.lower() for keyword in keywords):
-                                all_listings.append({
-                                    "text": text,
-                                    "url": href,
-                                    "source": url
-                                })
-                        else:
-                            if text:
-                                all_listings.append({
-                                    "text": text,
-                                    "url": href,
-                                    "source": url
-                                })
-            except Exception as e:
-                print(f"Error scraping {url}: {e}")
-                all_listings.append({
-                    "error": str(e),
-                    "source": url
-                })
+        if wants_stream(data):
+            encoder = stream_encoder(request.headers.get("Accept", ""))
+            gzip = GzipStream() if wants_gzip() else None
+            
+            def generate():
+                buffer = []
+                try:
+                    for kind, record in results:
+                        if kind != "page":
+                            buffer.append(encoder.encode(kind, record))
+                        if kind not in ("page", "error"):
+                            continue
+                        # Konec stránky - odešleme vše najednou (a komprimovaně vyprázdníme)
+                        chunk = b"".join(buffer)
+                        buffer = []
+                        yield gzip.compress(chunk) + gzip.flush() if gzip else chunk
+                    chunk = b"".join(buffer)
+                except Exception as e:
+                    # Hlavička už byla odeslána, chybu předáme jako poslední záznam
+                    chunk = b"".join(buffer) + encoder.encode("error", {"error": str(e), "fatal": True})
+                yield gzip.compress(chunk) + gzip.finish() if gzip else chunk
+            
+            headers = {"Content-Encoding": "gzip"} if gzip else {}
+            return Response(generate(), mimetype=encoder.content_type, headers=headers)
+        
+        all_listings = []
+        errors = []
+        summary = {}
+        for kind, record in results:
+            if kind == "listing":
+                all_listings.append(record.to_dict())
+            elif kind == "error":
+                errors.append(record)
+            elif kind == "done":
+                summary = record
         
-        return jsonify({
+        body = {
             "success": True,
             "count": len(all_listings),
-            "listings": all_listings
-        }), 200
+            "pages": summary.get("pages", 0),
+            "listings": all_listings,
+            "errors": errors
+        }
+        if wants_gzip():
+            payload = gzip_bytes(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+            return Response(payload, mimetype="application/json", headers={"Content-Encoding": "gzip"})
+        return jsonify(body), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,257 @@
+import time
+import heapq
+import threading
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+USER_AGENT = "AI-Agents-Scraper/1.0"
+
+
+class RobotsCache:
+    """robots.txt pro každý host, načtený jednou a držený ttl sekund"""
+
+    def __init__(self, ttl=3600, timeout=5):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._cache = {}  # host -> (parser nebo None, načteno)
+
+    def _fetch(self, scheme, host):
+        parser = RobotFileParser()
+        try:
+            response = requests.get(f"{scheme}://{host}/robots.txt", timeout=self.timeout,
+                                    headers={"User-Agent": USER_AGENT})
+        except Exception:
+            return None  # robots.txt nedostupný -> bez omezení
+        if response.status_code >= 400:
+            return None
+        parser.parse(response.text.splitlines())
+        return parser
+
+    def _parser(self, url):
+        parsed = urlparse(url)
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(parsed.netloc)
+            if cached and now - cached[1] < self.ttl:
+                return cached[0]
+        parser = self._fetch(parsed.scheme or "https", parsed.netloc)
+        with self._lock:
+            self._cache[parsed.netloc] = (parser, now)
+        return parser
+
+    def allowed(self, url):
+        parser = self._parser(url)
+        return parser is None or parser.can_fetch(USER_AGENT, url)
+
+    def crawl_delay(self, url):
+        parser = self._parser(url)
+        if parser is None:
+            return None
+        return parser.crawl_delay(USER_AGENT)
+
+
+class HostPoliteness:
+    """
+    Nejvýše jeden požadavek na host a minimální rozestup mezi nimi - sdíleno napříč
+    všemi souběžnými crawly (host se rezervuje při odeslání, uvolní po dokončení).
+    """
+
+    def __init__(self, delay=1.0, poll=0.1):
+        self.delay = delay
+        self.poll = poll
+        self._lock = threading.Lock()
+        self._next_allowed = {}
+        self._in_flight = set()
+
+    def ready_in(self, host):
+        """Za kolik sekund bude host volný (u právě stahovaného hostu interval opakované kontroly)"""
+        with self._lock:
+            if host in self._in_flight:
+                return self.poll
+            return max(0.0, self._next_allowed.get(host, 0.0) - time.monotonic())
+
+    def try_acquire(self, host):
+        """Rezervuje host, pokud na něm nic neběží a uplynul rozestup"""
+        with self._lock:
+            if host in self._in_flight or self._next_allowed.get(host, 0.0) > time.monotonic():
+                return False
+            self._in_flight.add(host)
+            return True
+
+    def release(self, host, delay=None, fetched=True):
+        """Uvolní host; po skutečném stažení začne běžet rozestup (případně Crawl-delay)"""
+        with self._lock:
+            self._in_flight.discard(host)
+            if fetched:
+                self._next_allowed[host] = time.monotonic() + max(self.delay, delay or 0)
+
+
+class PageHistory:
+    """Kdy byla stránka naposledy stažena - nenavštívené stránky mají přednost"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._seen = {}
+
+    def last_seen(self, url):
+        with self._lock:
+            return self._seen.get(url)
+
+    def mark(self, url):
+        with self._lock:
+            self._seen.pop(url, None)
+            self._seen[url] = time.time()
+            if len(self._seen) > self.max_size:
+                self._seen.pop(next(iter(self._seen)))
+
+
+class CrawlFrontier:
+    """
+    Fronta stránek jednoho crawlu.
+
+    Priorita: nenavštívené stránky před již viděnými, mělčí před hlubšími.
+    Každá stránka se do fronty dostane jen jednou, hloubka je omezena
+    max_pages na každý vstupní (seed) zdroj.
+    """
+
+    def __init__(self, history, max_pages):
+        self.history = history
+        self.max_pages = max_pages
+        self._heap = []
+        self._queued = set()
+        self._counter = 0
+
+    def push(self, url, seed, depth):
+        if url in self._queued or depth >= self.max_pages:
+            return False
+        self._queued.add(url)
+        seen = 1 if self.history.last_seen(url) else 0
+        self._counter += 1
+        heapq.heappush(self._heap, (seen, depth, self._counter, url, seed))
+        return True
+
+    def pop_ready(self, is_ready):
+        """Vyjme nejprioritnější stránku, jejíž host je připraven (is_ready host zároveň rezervuje)"""
+        skipped = []
+        found = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if is_ready(entry[3]):
+                found = entry
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        if found is None:
+            return None
+        _, depth, _, url, seed = found
+        return url, seed, depth
+
+    def urls(self):
+        return [entry[3] for entry in self._heap]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class Crawler:
+    """
+    Stahuje vstupní URL včetně stránkování.
+
+    Na každý host běží nejvýše jeden požadavek (i napříč souběžnými crawly)
+    a mezi požadavky je rozestup (HostPoliteness, případně Crawl-delay z robots.txt).
+    Různé hosty se stahují paralelně. Výsledky se vrací generátorem
+    hned po zpracování každé stránky.
+    """
+
+    def __init__(self, politeness, robots, history, source_health, workers=4):
+        self.politeness = politeness
+        self.robots = robots
+        self.history = history
+        self.source_health = source_health
+        self.workers = workers
+
+    def crawl(self, seeds, fetch_page, max_pages=1):
+        """
+        fetch_page(url, seed) -> (listings, next_urls); generátor vrací slovníky
+        {"page", "source", "depth", "listings"} nebo {"page", "source", "error"}.
+        """
+        frontier = CrawlFrontier(self.history, max_pages)
+        for seed in seeds:
+            frontier.push(seed, seed, 0)
+
+        in_flight = {}
+
+        def host_of(url):
+            return urlparse(url).netloc
+
+        def acquire(url):
+            return self.politeness.try_acquire(host_of(url))
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                while len(frontier) or in_flight:
+                    # Odeslání všech stránek, jejichž host je volný (pop_ready host rovnou rezervuje)
+                    while len(in_flight) < self.workers:
+                        item = frontier.pop_ready(acquire)
+                        if item is None:
+                            break
+                        url, seed, depth = item
+                        host = host_of(url)
+
+                        # robots.txt před jističem - povolený zkušební požadavek (half_open) se pak vždy stáhne
+                        if not self.robots.allowed(url):
+                            self.politeness.release(host, fetched=False)
+                            yield {"page": url, "source": seed, "error": "disallowed by robots.txt", "skipped": True}
+                            continue
+                        if not self.source_health.allow(url):
+                            self.politeness.release(host, fetched=False)
+                            yield {"page": url, "source": seed, "error": "circuit open", "skipped": True}
+                            continue
+
+                        self.history.mark(url)
+                        future = pool.submit(self._fetch, fetch_page, url, seed)
+                        in_flight[future] = (url, seed, depth, host)
+
+                    if not in_flight:
+                        # Vše ve frontě čeká na rozestup hostů (nebo je stahuje jiný crawl)
+                        if len(frontier):
+                            delays = [self.politeness.ready_in(host_of(url)) for url in frontier.urls()]
+                            time.sleep(max(0.01, min(delays)))
+                        continue
+
+                    done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url, seed, depth, host = in_flight.pop(future)
+                        self.politeness.release(host, self.robots.crawl_delay(url))
+
+                        listings, next_urls, error, latency = future.result()
+                        if error:
+                            self.source_health.record_failure(url, error, latency)
+                            yield {"page": url, "source": seed, "error": error}
+                            continue
+
+                        self.source_health.record_success(url, latency)
+                        for next_url in next_urls:
+                            if host_of(next_url) == host:
+                                frontier.push(next_url, seed, depth + 1)
+                        yield {"page": url, "source": seed, "depth": depth, "listings": listings}
+        finally:
+            # Předčasně ukončený crawl (konzument přestal číst) - executor už stažení dokončil,
+            # hosty se musí uvolnit, jinak by zůstaly rezervované i pro další crawly
+            for url, seed, depth, host in in_flight.values():
+                self.politeness.release(host)
+
+    def _fetch(self, fetch_page, url, seed):
+        started = time.monotonic()
+        try:
+            listings, next_urls = fetch_page(url, seed)
+            return listings, next_urls, None, time.monotonic() - started
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            return [], [], str(e), time.monotonic() - started
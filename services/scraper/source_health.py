@@ -0,0 +1,131 @@
+import time
+import threading
+from urllib.parse import urlparse
+
+
+class SourceHealth:
+    """
+    Zdraví jednoho zdroje (portálu) s jističem (circuit breaker).
+
+    closed    - zdroj se normálně stahuje
+    open      - po failure_threshold chybách za sebou se zdroj přeskakuje
+    half_open - po uplynutí cooldownu se pustí jeden zkušební požadavek
+                (ostatní se do jeho výsledku přeskakují); úspěch jistič zavře,
+                chyba ho znovu otevře. Zkouška bez výsledku (např. přerušený
+                crawl) po dalším cooldownu vyprší a pustí se nová.
+    """
+
+    def __init__(self, name, failure_threshold, cooldown, alpha=0.3):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self.state = "closed"
+        self.successes = 0
+        self.failures = 0
+        self.skipped = 0
+        self.consecutive_failures = 0
+        self.success_rate = 1.0  # EWMA úspěšnosti
+        self.latency_ewma = None
+        self.opened_at = None
+        self.probe_started = None  # čas zkušebního požadavku v half_open, None = žádný neběží
+        self.last_error = None
+        self.last_checked = None
+
+    def allow(self, now):
+        if self.state == "open" and now - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self.probe_started is None or now - self.probe_started >= self.cooldown:
+                self.probe_started = now
+                return True
+            self.skipped += 1
+            return False
+        if self.state == "open":
+            self.skipped += 1
+            return False
+        return True
+
+    def _observe(self, ok, latency, now):
+        self.last_checked = now
+        self.success_rate = self.alpha * (1.0 if ok else 0.0) + (1 - self.alpha) * self.success_rate
+        if latency is not None:
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = self.alpha * latency + (1 - self.alpha) * self.latency_ewma
+
+    def record_success(self, latency, now):
+        self._observe(True, latency, now)
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.state = "closed"
+        self.opened_at = None
+        self.probe_started = None
+
+    def record_failure(self, error, latency, now):
+        self._observe(False, latency, now)
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = now
+            self.probe_started = None
+
+    def to_dict(self, now):
+        retry_in = None
+        if self.state == "open":
+            retry_in = max(0.0, round(self.opened_at + self.cooldown - now, 1))
+        return {
+            "state": self.state,
+            "probe_in_flight": self.probe_started is not None,
+            "successes": self.successes,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "consecutive_failures": self.consecutive_failures,
+            "success_rate": round(self.success_rate, 3),
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "last_error": self.last_error,
+            "last_checked": self.last_checked,
+            "retry_in": retry_in
+        }
+
+
+class SourceHealthRegistry:
+    """Zdraví všech zdrojů, klíčem je host URL (jeden portál = jeden jistič)"""
+
+    def __init__(self, failure_threshold=3, cooldown=300):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._sources = {}
+
+    @staticmethod
+    def source_key(url):
+        return urlparse(url).netloc or url
+
+    def _get(self, url):
+        key = self.source_key(url)
+        health = self._sources.get(key)
+        if health is None:
+            health = SourceHealth(key, self.failure_threshold, self.cooldown)
+            self._sources[key] = health
+        return health
+
+    def allow(self, url):
+        with self._lock:
+            return self._get(url).allow(time.time())
+
+    def record_success(self, url, latency):
+        with self._lock:
+            self._get(url).record_success(latency, time.time())
+
+    def record_failure(self, url, error, latency=None):
+        with self._lock:
+            self._get(url).record_failure(error, latency, time.time())
+
+    def status(self):
+        now = time.time()
+        with self._lock:
+            return {key: health.to_dict(now) for key, health in self._sources.items()}
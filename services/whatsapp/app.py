@@ -1,37 +1,90 @@
 from flask import Flask, request, jsonify
-from twilio.rest import Client
 import os
+import sys
+import threading
+# Sdílený profiling.py leží ve services/common (v obrazu se kopíruje vedle app.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import profiling
 
 app = Flask(__name__)
+# Profilování za běhu (/debug/profile, hlavička X-Profile), jen s DEBUG_TOKEN
+profiling.install(app, "whatsapp")
 
 # Konfigurace Twilio z prostředí
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_WHATSAPP_NUMBER = os.getenv("TWILIO_WHATSAPP_NUMBER")
+# Výchozí timeout volání Twilio API (s)
+TWILIO_TIMEOUT = float(os.getenv("TWILIO_TIMEOUT", 30))
+
+# Twilio klienti - SDK se načte na pozadí po startu (nebo při prvním požadavku)
+# a klient se sdílí mezi požadavky (znovupoužití HTTP spojení). Timeout je vlastnost
+# HTTP klienta, proto jeden klient na každý použitý timeout (v praxi jeden až dva).
+_clients = {}
+_client_lock = threading.Lock()
+_ready = threading.Event()
+_warm_error = None
+
+def get_client(timeout=None):
+    timeout = timeout or TWILIO_TIMEOUT
+    client = _clients.get(timeout)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(timeout)
+            if client is None:
+                from twilio.rest import Client
+                from twilio.http.http_client import TwilioHttpClient
+                client = _clients[timeout] = Client(
+                    TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN,
+                    http_client=TwilioHttpClient(timeout=timeout)
+                )
+                _ready.set()
+    return client
+
+def warm_up():
+    global _warm_error
+    if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN]):
+        _warm_error = "missing Twilio credentials"
+        return
+    try:
+        get_client()
+    except Exception as e:
+        _warm_error = str(e)
+        print(f"Warm-up failed: {e}")
+
+threading.Thread(target=warm_up, daemon=True).start()
 
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({"status": "healthy", "service": "whatsapp"}), 200
 
-@app.route('/send', methods=['POST'])
-def send_whatsapp():
+@app.route('/ready', methods=['GET'])
+def ready():
     """
-    Očekávaný JSON:
-    {
-        "to": "+420123456789",  # musí začínat +
-        "message": "Text zprávy"
-    }
+    Připravenost - SDK načteno a klient vytvořen. Chybějící přihlašovací údaje jsou
+    trvalý stav, ne "ještě nezahřáto" - hlásí se jako configured: false.
+    """
+    if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_WHATSAPP_NUMBER]):
+        return jsonify({"ready": True, "configured": False, "service": "whatsapp",
+                        "error": "missing Twilio credentials"}), 200
+    if not _ready.is_set():
+        return jsonify({"ready": False, "service": "whatsapp", "error": _warm_error}), 503
+    return jsonify({"ready": True, "configured": True, "service": "whatsapp"}), 200
+
+def send_request(data, timeout=None):
+    """
+    Jádro /send - sdílené s agentem v embedded režimu, vrací (odpověď, HTTP status).
+    timeout (s) platí pro volání Twilio API, bez něj TWILIO_TIMEOUT.
     """
     try:
-        data = request.get_json()
         recipient = data.get('to')
         message = data.get('message')
         
         if not all([recipient, message]):
-            return jsonify({"error": "Missing required fields: to, message"}), 400
+            return {"error": "Missing required fields: to, message"}, 400
         
         if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_WHATSAPP_NUMBER]):
-            return jsonify({"error": "WhatsApp service not configured (missing Twilio credentials)"}), 500
+            return {"error": "WhatsApp service not configured (missing Twilio credentials)"}, 500
         
         # Přidání whatsapp: prefixu pokud chybí
         if not recipient.startswith("whatsapp:"):
@@ -41,22 +94,33 @@ def send_whatsapp():
         if not twilio_from.startswith("whatsapp:"):
             twilio_from = f"whatsapp:{twilio_from}"
         
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        msg = client.messages.create(
+        msg = get_client(timeout).messages.create(
             from_=twilio_from,
             body=message,
             to=recipient
         )
         
-        return jsonify({
+        return {
             "success": True,
             "message": "WhatsApp message sent successfully",
             "message_sid": msg.sid,
             "to": recipient
-        }), 200
+        }, 200
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
+
+@app.route('/send', methods=['POST'])
+def send_whatsapp():
+    """
+    Očekávaný JSON:
+    {
+        "to": "+420123456789",  # musí začínat +
+        "message": "Text zprávy"
+    }
+    """
+    body, status = send_request(request.get_json(silent=True) or {})
+    return jsonify(body), status
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5004, debug=False)